@@ -0,0 +1,152 @@
+"""Удаление аккаунта без каскада Django по всем таблицам сразу.
+
+request_deletion в одной короткой транзакции деактивирует пользователя
+и скрывает его посты и комментарии — из лент и профиля он пропадает
+сразу. Дальше воркер идёт по этапам STAGES и удаляет строки пачками по
+id, сохраняя этап и последний id в AccountDeletion после каждой пачки.
+Сам User удаляется последним, когда ссылаться на него уже нечему.
+Воркер берёт удаление в аренду на LEASE_SECONDS и продлевает её после
+каждой пачки: второй воркер его не возьмёт, а удаление упавшего
+подхватит, когда аренда истечёт."""
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .feed_cache import card_key, forget_follow_feed, forget_follower_feeds
+from .follow_cache import forget_following
+from .models import (AccountDeletion, ArchivedComment, ArchivedPost, Comment,
+                     Follow, FollowSuggestion, Mention, ModerationJob, Post,
+                     User)
+from .moderation import delete_images, moderate_chunk
+from .page_cache import forget_pages
+from .resolvers import forget_user
+from .trending import update_trending
+from .typeahead import user_removed
+
+
+def forget_comment_cards(deletion, rows):
+    cache.delete_many([card_key(False, post_id) for _, post_id in rows])
+
+
+def forget_followers(deletion, rows):
+    for _, follower_id in rows:
+        forget_following(follower_id)
+        forget_follow_feed(follower_id)
+
+
+def delete_posts(deletion, ids):
+    return moderate_chunk(ModerationJob.DELETE, Post, ids)
+
+
+def delete_archived_posts(deletion, ids):
+    return moderate_chunk(ModerationJob.DELETE, ArchivedPost, ids)
+
+
+# Этап: (название, модель, поле со ссылкой на пользователя, второе поле
+# для after, удаление пачки или None для простого DELETE, after).
+STAGES = (
+    ('comments', Comment, 'author_id', 'post_id', None,
+     forget_comment_cards),
+    ('archived_comments', ArchivedComment, 'author_id', 'post_id', None,
+     None),
+    ('following', Follow, 'user_id', 'author_id', None, None),
+    ('followers', Follow, 'author_id', 'user_id', None, forget_followers),
+    ('mentions', Mention, 'user_id', 'post_id', None, None),
+    ('suggestions', FollowSuggestion, 'user_id', 'suggested_id', None,
+     None),
+    ('suggested', FollowSuggestion, 'suggested_id', 'user_id', None, None),
+    ('posts', Post, 'author_id', 'id', delete_posts, None),
+    ('archived_posts', ArchivedPost, 'author_id', 'id',
+     delete_archived_posts, None),
+)
+STAGE_NAMES = [stage[0] for stage in STAGES]
+LEASE_SECONDS = 5 * 60
+
+
+def lease_deadline():
+    return timezone.now() + timedelta(seconds=LEASE_SECONDS)
+
+
+def request_deletion(user):
+    """Прячет пользователя и всё, что он написал, и ставит удаление в
+    очередь. Повторный вызов для того же пользователя ничего не делает."""
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        for model in (Post, Comment, ArchivedPost, ArchivedComment):
+            model.all_objects.filter(author_id=user.pk).update(
+                is_hidden=True
+            )
+        deletion, _ = AccountDeletion.objects.get_or_create(
+            user_id=user.pk, defaults={'username': user.username}
+        )
+    forget_user(user)
+    user_removed(user.pk)
+    forget_pages(('user', user.pk))
+    forget_follow_feed(user.pk)
+    forget_follower_feeds(user.pk)
+    return deletion
+
+
+def next_deletion():
+    """Забирает самое старое удаление, которое никто не выполняет.
+    Условный UPDATE по прежнему сроку аренды не даёт двум воркерам
+    взять одно и то же удаление."""
+    for deletion in AccountDeletion.objects.filter(
+        Q(leased_until=None) | Q(leased_until__lte=timezone.now()),
+        status=AccountDeletion.PENDING
+    ):
+        leased_until = lease_deadline()
+        taken = AccountDeletion.objects.filter(
+            pk=deletion.pk, status=AccountDeletion.PENDING,
+            leased_until=deletion.leased_until
+        ).update(leased_until=leased_until)
+        if taken:
+            deletion.leased_until = leased_until
+            return deletion
+    return None
+
+
+def run_deletion(deletion, chunk_size=500, pause=0):
+    """Выполняет удаление с сохранённого места и после каждой пачки
+    отдаёт общее число удалённых строк."""
+    start = STAGE_NAMES.index(deletion.stage) if deletion.stage else 0
+    for name, model, field, other, delete, after in STAGES[start:]:
+        if deletion.stage != name:
+            deletion.stage, deletion.last_id = name, 0
+        queryset = model._base_manager.filter(**{field: deletion.user_id})
+        while True:
+            rows = list(
+                queryset.filter(id__gt=deletion.last_id).order_by('id')
+                .values_list('id', other)[:chunk_size]
+            )
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            with transaction.atomic():
+                if delete is None:
+                    model._base_manager.filter(id__in=ids).delete()
+                    images = []
+                else:
+                    images = delete(deletion, ids)
+                deletion.last_id = ids[-1]
+                deletion.deleted += len(ids)
+                deletion.leased_until = lease_deadline()
+                deletion.save(update_fields=[
+                    'stage', 'last_id', 'deleted', 'leased_until'
+                ])
+            if after is not None:
+                after(deletion, rows)
+            delete_images(images)
+            yield deletion.deleted
+            if pause:
+                time.sleep(pause)
+    with transaction.atomic():
+        User.objects.filter(pk=deletion.user_id).delete()
+        deletion.status = AccountDeletion.DONE
+        deletion.finished = timezone.now()
+        deletion.save(update_fields=['stage', 'status', 'finished'])
+    update_trending()
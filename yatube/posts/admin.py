@@ -1,6 +1,108 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils.functional import cached_property
 
-from .models import Comment, Follow, Group, Post
+from .account_deletion import request_deletion
+from .models import (AccountDeletion, Comment, Follow, Group, ModerationJob,
+                     Post, User)
+
+KEYSET_VAR = 'id__lt'
+
+
+class KeysetPaginator(Paginator):
+    """Не считает строки в таблице: проверяет только, есть ли хоть одна
+    строка после текущей страницы."""
+
+    @cached_property
+    def count(self):
+        return len(
+            self.object_list[:self.per_page + 1].values_list('pk', flat=True)
+        )
+
+
+class KeysetChangeList(ChangeList):
+    """Листает по id: ссылка на следующую страницу — фильтр id__lt по
+    последней строке, а не OFFSET, который на дальних страницах
+    перебирает все пропущенные строки."""
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.next_url = self.first_url = None
+        if self.multi_page:
+            last = list(self.result_list)[-1]
+            self.next_url = self.get_query_string(
+                {KEYSET_VAR: last.pk}, [PAGE_VAR]
+            )
+        if KEYSET_VAR in self.params:
+            self.first_url = self.get_query_string(
+                remove=[KEYSET_VAR, PAGE_VAR]
+            )
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Общие настройки для таблиц на миллионы строк: без полного
+    подсчёта, без «показать все», только сортировка по id."""
+    paginator = KeysetPaginator
+    change_list_template = 'admin/posts/keyset_change_list.html'
+    show_full_result_count = False
+    list_max_show_all = 0
+    sortable_by = ()
+    ordering = ('-pk',)
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_queryset(self, request):
+        # В админке видно и скрытое модерацией:
+        queryset = getattr(
+            self.model, 'all_objects', self.model._default_manager
+        ).get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+
+def moderate_authors(action, description):
+    """Действие админки: ставит в очередь задание, которое удалит или
+    скроет всё, что написали авторы выбранных строк."""
+    def moderate(modeladmin, request, queryset):
+        # Воркер берёт только QUEUED: до записи авторов задание без
+        # фильтров затронуло бы весь сайт.
+        with transaction.atomic():
+            job = ModerationJob.objects.create(
+                action=action, status=ModerationJob.DRAFT
+            )
+            job.authors.set(
+                queryset.order_by()
+                .values_list('author_id', flat=True).distinct()
+            )
+            ModerationJob.objects.filter(pk=job.pk).update(
+                status=ModerationJob.QUEUED
+            )
+        modeladmin.message_user(
+            request,
+            f'Задание модерации {job.pk} поставлено в очередь, прогресс — '
+            f'в разделе «Moderation jobs».',
+            messages.SUCCESS
+        )
+    moderate.short_description = description
+    moderate.__name__ = f'{action}_by_authors'
+    return moderate
+
+
+MODERATION_ACTIONS = (
+    moderate_authors(
+        ModerationJob.HIDE, 'Скрыть всё от авторов выбранных записей'
+    ),
+    moderate_authors(
+        ModerationJob.DELETE, 'Удалить всё от авторов выбранных записей'
+    ),
+)
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -11,28 +113,99 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author')
+class PostAdmin(ScalableAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group', 'is_hidden')
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    # Фильтр по дате — фиксированный набор периодов, без перебора значений:
+    list_filter = ('pub_date', 'is_hidden')
+    date_hierarchy = 'pub_date'
+    actions = MODERATION_ACTIONS
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'created', 'author')
+class CommentAdmin(ScalableAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post', 'is_hidden')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author',)
+    raw_id_fields = ('post',)
     search_fields = ('text',)
-    list_filter = ('author',)
+    list_filter = ('is_hidden',)
+    date_hierarchy = 'created'
+    actions = MODERATION_ACTIONS
     empty_value_display = '-пусто-'
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(ScalableAdmin):
     list_display = ('pk', 'user', 'author')
-    search_fields = ('user',)
-    list_filter = ('author',)
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('=user__username', '=author__username')
     empty_value_display = '-пусто-'
 
 
+class ModerationJobForm(forms.ModelForm):
+    class Meta:
+        model = ModerationJob
+        fields = ('action', 'scope', 'authors', 'since', 'until')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not (cleaned_data.get('authors') or cleaned_data.get('since')
+                or cleaned_data.get('until')):
+            raise forms.ValidationError(
+                'Укажите авторов или промежуток времени — иначе задание '
+                'затронет весь сайт.'
+            )
+        return cleaned_data
+
+
+class ModerationJobAdmin(admin.ModelAdmin):
+    form = ModerationJobForm
+    list_display = (
+        'pk', 'action', 'scope', 'status', 'progress', 'created', 'finished'
+    )
+    list_filter = ('status',)
+    autocomplete_fields = ('authors',)
+    readonly_fields = (
+        'status', 'total', 'processed', 'error', 'created', 'finished'
+    )
+
+    def progress(self, job):
+        return f'{job.processed} из {job.total}'
+    progress.short_description = 'прогресс'
+
+
+class UserAdmin(BaseUserAdmin):
+    actions = ('delete_in_background',)
+
+    def delete_in_background(self, request, queryset):
+        for user in queryset:
+            request_deletion(user)
+        self.message_user(
+            request,
+            'Пользователи скрыты, данные удалит воркер delete_accounts.',
+            messages.SUCCESS
+        )
+    delete_in_background.short_description = (
+        'Удалить выбранных пользователей в фоне'
+    )
+
+
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        'username', 'status', 'stage', 'deleted', 'created', 'finished'
+    )
+    list_filter = ('status',)
+    readonly_fields = list_display
+
+
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Post, PostAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(ModerationJob, ModerationJobAdmin)
+admin.site.register(AccountDeletion, AccountDeletionAdmin)
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
@@ -0,0 +1,86 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+ARCHIVE_VERSION_KEY = 'archive:version'
+
+
+def archive_version():
+    """Номер «поколения» архива: меняется после каждой пачки, чтобы
+    закэшированные счётчики архивных постов устаревали."""
+    # Не с единицы: после вытеснения версия не должна совпасть с той,
+    # под которой в кэше ещё лежат старые счётчики.
+    return cache.get_or_set(
+        ARCHIVE_VERSION_KEY, lambda: int(time.time() * 1000), None
+    )
+
+
+def bump_archive_version():
+    try:
+        cache.incr(ARCHIVE_VERSION_KEY)
+    except ValueError:
+        # Версии нет: новая, от текущего времени, и так новее прежних.
+        archive_version()
+
+
+def archive_batch(before, batch_size):
+    """Переносит в архив не больше batch_size самых старых постов,
+    опубликованных раньше before, вместе с комментариями. Пометка
+    is_hidden переносится как есть."""
+    with transaction.atomic():
+        posts = list(
+            Post.all_objects.filter(pub_date__lt=before)
+            .order_by('pub_date', 'id')[:batch_size]
+        )
+        if not posts:
+            return 0
+        ids = [post.id for post in posts]
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(
+                id=post.id,
+                text=post.text,
+                text_html=post.text_html,
+                excerpt=post.excerpt,
+                pub_date=post.pub_date,
+                author_id=post.author_id,
+                group_id=post.group_id,
+                image=post.image.name or None,
+                is_hidden=post.is_hidden,
+            )
+            for post in posts
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(
+                id=comment.id,
+                post_id=comment.post_id,
+                author_id=comment.author_id,
+                text=comment.text,
+                text_html=comment.text_html,
+                created=comment.created,
+                is_hidden=comment.is_hidden,
+            )
+            for comment in Comment.all_objects.filter(
+                post_id__in=ids
+            ).iterator()
+        )
+        # Скрытое модерацией переезжает в архив скрытым, а не пропадает:
+        # скрытие можно отменить, удаление — нет.
+        Comment.all_objects.filter(post_id__in=ids).delete()
+        Post.all_objects.filter(id__in=ids).delete()
+    bump_archive_version()
+    return len(ids)
+
+
+def archive_posts(before, batch_size=500, pause=0):
+    """Архивирует посты пачками, каждая в своей короткой транзакции,
+    и после каждой пачки отдаёт количество перенесённых постов."""
+    while True:
+        moved = archive_batch(before, batch_size)
+        if not moved:
+            return
+        yield moved
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,126 @@
+"""Кэш ленты подписок.
+
+Для каждого пользователя храним только число постов в его ленте и
+ссылки (архивный ли пост, id) на первые FOLLOW_FEED_PAGES страниц. Сами
+карточки лежат в общем кэше карточек по одной на пост, поэтому пост
+популярного автора хранится один раз, а не в ленте каждого подписчика.
+Карточка — строка FeedPost, а не готовый HTML: кнопки в post_item
+зависят от того, кто смотрит.
+
+Ленту сбрасываем, когда пользователь подписывается или отписывается и
+когда автор, на которого он подписан, публикует или правит пост;
+карточку — при правке поста и новом комментарии. Ключ ленты включает
+версии всех авторов, на которых подписан пользователь (как области в
+page_cache), поэтому пост автора увеличивает одну его версию, а не
+удаляет ленты всех его подписчиков. Промахи читаются из
+основной базы: отставшая реплика без свежего поста иначе легла бы в
+кэш на FOLLOW_FEED_TIMEOUT уже после сброса."""
+from hashlib import md5
+
+from django.core.cache import cache
+
+from yatube.routers import primary_reads
+from yatube.settings import ITEMS_PER_PAGE
+
+from .archive import archive_version
+from .feeds import follow_feed
+from .follow_cache import following_ids
+from .models import ArchivedPost, Post
+from .page_cache import forget_pages, scope_versions
+from .read_models import feed_rows
+
+FOLLOW_FEED_PAGES = 3
+FOLLOW_FEED_TIMEOUT = 60 * 10
+CARD_TIMEOUT = 60 * 10
+
+
+def card_key(archived, post_id):
+    return f'post-card:{int(archived)}:{post_id}'
+
+
+def author_scope(author_id):
+    return ('follow-feed', author_id)
+
+
+def follow_feed_key(user_id):
+    versions = scope_versions(
+        [author_scope(author_id) for author_id in following_ids(user_id)]
+    )
+    digest = md5('.'.join(map(str, versions)).encode()).hexdigest()
+    # Архивация переносит посты в другую таблицу, поэтому старые ссылки
+    # после неё не годятся:
+    return f'follow-feed:{archive_version()}:{user_id}:{digest}'
+
+
+def remember_cards(rows):
+    cache.set_many(
+        {card_key(row.is_archived, row.id): row for row in rows},
+        CARD_TIMEOUT
+    )
+
+
+def get_cards(refs):
+    """Карточки по ссылкам в том же порядке; недостающие добираются из
+    базы одним запросом на таблицу. Удалённые посты пропускаются."""
+    keys = [card_key(*ref) for ref in refs]
+    found = cache.get_many(keys)
+    missing = [ref for ref, key in zip(refs, keys) if key not in found]
+    for archived, model in ((False, Post), (True, ArchivedPost)):
+        ids = [post_id for flag, post_id in missing if flag == archived]
+        if ids:
+            with primary_reads():
+                rows = feed_rows(model.objects.filter(id__in=ids), 0, None)
+            remember_cards(rows)
+            found.update(
+                (card_key(row.is_archived, row.id), row) for row in rows
+            )
+    return [found[key] for key in keys if key in found]
+
+
+def forget_card(post):
+    cache.delete(card_key(post.is_archived, post.id))
+
+
+def forget_follow_feed(user_id):
+    cache.delete(follow_feed_key(user_id))
+
+
+def forget_follower_feeds(author_id):
+    forget_pages(author_scope(author_id))
+
+
+class CachedFollowFeed:
+    """Лента подписок с тем же интерфейсом, что и TieredFeed: первые
+    страницы собираются из кэша без запросов к лентам, дальше — обычная
+    follow_feed."""
+
+    def __init__(self, user):
+        self.feed = follow_feed(user)
+        key = follow_feed_key(user.id)
+        cached = cache.get(key)
+        if cached is None:
+            with primary_reads():
+                rows = self.feed[0:FOLLOW_FEED_PAGES * ITEMS_PER_PAGE]
+                cached = (
+                    self.feed.count(),
+                    [(row.is_archived, row.id) for row in rows],
+                )
+            remember_cards(rows)
+            cache.set(key, cached, FOLLOW_FEED_TIMEOUT)
+        self.total, self.refs = cached
+
+    def count(self):
+        return self.total
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        stop = index.stop
+        if len(self.refs) >= self.total or (
+            stop is not None and stop <= len(self.refs)
+        ):
+            return get_cards(self.refs[index])
+        return self.feed[index]
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from yatube.routers import primary_reads
+
+from .archive import archive_version
+from .models import ArchivedPost, Post
+from .read_models import feed_rows
+
+ARCHIVE_COUNT_TIMEOUT = 60 * 60
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def feed_cursor(post):
+    """Курсор бесконечной ленты после поста: микросекунды pub_date и id.
+    Архив хранит посты с прежними id, поэтому пара однозначна в обеих
+    таблицах."""
+    return f'{(post.pub_date - EPOCH) // MICROSECOND}_{post.id}'
+
+
+def parse_cursor(cursor):
+    """Ключ (pub_date, id) из курсора или None для начала ленты."""
+    try:
+        micros, post_id = map(int, cursor.split('_'))
+        return EPOCH + micros * MICROSECOND, post_id
+    except (ValueError, OverflowError):
+        return None
+
+
+def keyset(queryset, key):
+    """Посты старше ключа в порядке ленты; индекс по pub_date в SQLite
+    включает rowid, поэтому сортировка с id не требует отдельного
+    прохода."""
+    queryset = queryset.order_by('-pub_date', '-id')
+    if key is None:
+        return queryset
+    pub_date, post_id = key
+    return queryset.filter(
+        Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=post_id)
+    )
+
+
+class TieredFeed:
+    """Лента поверх двух таблиц: сначала читаем свежие посты, а в архив
+    идём, только когда страница заходит за последний свежий пост.
+
+    Поддерживает count() и срезы, поэтому её можно отдавать в Paginator
+    вместо QuerySet. rows(queryset, start, stop) строит элементы среза;
+    по умолчанию это лёгкие строки из read_models, а не модели целиком.
+    Без cold лента читает только одну таблицу."""
+
+    def __init__(self, hot, cold=None, cache_key=None, rows=feed_rows):
+        self.hot = hot
+        self.cold = cold
+        self.cache_key = cache_key
+        self.rows = rows
+        self._hot_count = None
+
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def cold_count(self):
+        # Архив меняется только пачками archive_posts, поэтому его счётчик
+        # можно держать в кэше до следующей пачки. Считается он в основной
+        # базе: реплика могла ещё не получить последнюю пачку.
+        if self.cold is None:
+            return 0
+        if self.cache_key is None:
+            return self.cold.count()
+        key = f'feed:archived:{archive_version()}:{self.cache_key}'
+        count = cache.get(key)
+        if count is None:
+            with primary_reads():
+                count = self.cold.count()
+            cache.set(key, count, ARCHIVE_COUNT_TIMEOUT)
+        return count
+
+    def count(self):
+        return self.hot_count() + self.cold_count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        hot_count = self.hot_count()
+        items = []
+        if start < hot_count:
+            items.extend(self.rows(self.hot, start, stop))
+        if self.cold is not None and (stop is None or stop > hot_count):
+            cold_start = max(start - hot_count, 0)
+            cold_stop = None if stop is None else stop - hot_count
+            items.extend(self.rows(self.cold, cold_start, cold_stop))
+        return items
+
+    def after(self, key, limit):
+        """До limit постов после ключа (pub_date, id) для бесконечной
+        ленты: без OFFSET и без COUNT, а опубликованный между подгрузками
+        пост не сдвигает выдачу. В архив идём, только если свежих постов
+        после ключа не хватило."""
+        items = self.rows(keyset(self.hot, key), 0, limit)
+        if self.cold is None or len(items) == limit:
+            return items
+        return items + self.rows(
+            keyset(self.cold, key), 0, limit - len(items)
+        )
+
+
+def index_feed():
+    return TieredFeed(
+        Post.objects.all(),
+        ArchivedPost.objects.all(),
+        'index',
+    )
+
+
+def group_feed(group):
+    return TieredFeed(
+        group.posts.all(),
+        group.archived_posts.all(),
+        f'group:{group.pk}',
+    )
+
+
+def profile_feed(author):
+    return TieredFeed(
+        author.posts.all(),
+        author.archived_posts.all(),
+        f'profile:{author.pk}',
+    )
+
+
+def follow_feed(user):
+    # Подписки меняются часто, поэтому архивный счётчик здесь не кэшируем.
+    return TieredFeed(
+        Post.objects.filter(author__following__user=user),
+        ArchivedPost.objects.filter(author__following__user=user),
+    )
+
+
+def model_rows(queryset, start, stop):
+    """Полные экземпляры моделей — для сравнения с лёгкими строками."""
+    return list(queryset.select_related('author', 'group')[start:stop])
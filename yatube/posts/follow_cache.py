@@ -0,0 +1,55 @@
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from yatube.routers import primary_reads
+
+from .models import Follow
+
+FOLLOWING_TIMEOUT = 60 * 60
+
+
+def following_key(user_id):
+    return f'following:{user_id}'
+
+
+def following_ids(user_id):
+    """Отсортированный массив id авторов, на которых подписан
+    пользователь. Грузится из базы один раз, дальше живёт в кэше до
+    следующей подписки или отписки."""
+    ids = cache.get(following_key(user_id))
+    if ids is None:
+        with primary_reads():
+            ids = array('q', Follow.objects.filter(
+                user_id=user_id
+            ).order_by('author_id').values_list('author_id', flat=True))
+        cache.set(following_key(user_id), ids, FOLLOWING_TIMEOUT)
+    return ids
+
+
+def contains(ids, author_id):
+    position = bisect_left(ids, author_id)
+    return position < len(ids) and ids[position] == author_id
+
+
+def is_following(user, author_id):
+    if not user.is_authenticated:
+        return False
+    return contains(following_ids(user.id), author_id)
+
+
+def followed_among(user, author_ids):
+    """Из переданных id авторов оставляет тех, на кого подписан
+    пользователь, — одна проверка на всю страницу ленты."""
+    if not user.is_authenticated:
+        return set()
+    ids = following_ids(user.id)
+    return {author_id for author_id in author_ids if contains(ids, author_id)}
+
+
+def forget_following(user_id):
+    """Сбрасывает набор после подписки или отписки; вызывать после
+    коммита. Правка закэшированного массива на месте теряла бы
+    изменения при одновременных подписках."""
+    cache.delete(following_key(user_id))
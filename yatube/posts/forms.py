@@ -1,5 +1,8 @@
 from django import forms
+from django.conf import settings
+from django.urls import reverse
 
+from .group_index import group_choices, group_entries
 from .models import Comment, Post
 
 
@@ -18,6 +21,29 @@ class PostForm(forms.ModelForm):
             'image': 'Необязательно',
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Варианты берутся из кэша при отрисовке, а не из queryset поля;
+        # выбранное значение по-прежнему проверяется запросом по id.
+        group = self.fields['group']
+        if len(group_entries()) > settings.GROUP_SELECT_LIMIT:
+            group.choices = self.picked_group
+            group.widget.attrs['data-search'] = reverse('group_search')
+        else:
+            group.choices = self.all_groups
+
+    def all_groups(self):
+        return [('', self.fields['group'].empty_label)] + group_choices()
+
+    def picked_group(self):
+        """Групп слишком много для <select>: в нём только выбранная,
+        остальные подставляет поиск по началу названия."""
+        value = str(self['group'].value() or '')
+        return [('', self.fields['group'].empty_label)] + [
+            (pk, title) for _, pk, title in group_entries()
+            if str(pk) == value
+        ]
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
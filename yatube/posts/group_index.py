@@ -0,0 +1,49 @@
+"""Группы для формы поста и поиск группы по началу названия.
+
+Все группы лежат в кэше одним списком (название в casefold, id,
+название), отсортированным по первому полю. Из него строятся варианты
+<select>, а bisect находит группы по префиксу без запроса к базе.
+Список сбрасывается сигналом при сохранении и удалении группы."""
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .models import Group
+
+GROUPS_KEY = 'groups:index'
+SEARCH_LIMIT = 10
+
+
+def group_entries():
+    entries = cache.get(GROUPS_KEY)
+    if entries is None:
+        entries = sorted(
+            (title.casefold(), pk, title)
+            for pk, title in Group.objects.values_list('id', 'title')
+        )
+        cache.set(GROUPS_KEY, entries, None)
+    return entries
+
+
+def forget_groups():
+    cache.delete(GROUPS_KEY)
+
+
+def group_choices():
+    return [(pk, title) for _, pk, title in group_entries()]
+
+
+def search_groups(prefix, limit=SEARCH_LIMIT):
+    """До limit пар (id, название) групп, названия которых начинаются
+    с prefix без учёта регистра, по алфавиту."""
+    prefix = prefix.strip().casefold()
+    if not prefix:
+        return []
+    entries = group_entries()
+    start = bisect_left(entries, (prefix,))
+    found = []
+    for key, pk, title in entries[start:start + limit]:
+        if not key.startswith(prefix):
+            break
+        found.append((pk, title))
+    return found
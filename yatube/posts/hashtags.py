@@ -0,0 +1,106 @@
+import re
+
+from django.db import transaction
+
+from .models import Mention, Post, PostTag, Tag, User
+
+TAG_RE = re.compile(r'(?<![\w&])#(\w{1,100})')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.@+-]{1,150})')
+
+
+def extract_tags(text):
+    return {tag.lower() for tag in TAG_RE.findall(text)}
+
+
+def extract_mentions(text):
+    # Точка в конце предложения к имени пользователя не относится:
+    return {name.rstrip('.') for name in MENTION_RE.findall(text)} - {''}
+
+
+def get_tag_ids(names):
+    if not names:
+        return {}
+    Tag.objects.bulk_create(
+        (Tag(name=name) for name in names), ignore_conflicts=True
+    )
+    return dict(
+        Tag.objects.filter(name__in=names).values_list('name', 'id')
+    )
+
+
+def get_user_ids(usernames):
+    if not usernames:
+        return {}
+    return dict(
+        User.objects.filter(username__in=usernames)
+        .values_list('username', 'id')
+    )
+
+
+def index_post(post):
+    """Пересобирает хэштеги и упоминания одного поста после сохранения."""
+    tag_ids = set(get_tag_ids(extract_tags(post.text)).values())
+    user_ids = set(get_user_ids(extract_mentions(post.text)).values())
+    with transaction.atomic():
+        post.post_tags.exclude(tag_id__in=tag_ids).delete()
+        post.mentions.exclude(user_id__in=user_ids).delete()
+        PostTag.objects.bulk_create(
+            (
+                PostTag(tag_id=tag_id, post=post, pub_date=post.pub_date)
+                for tag_id in tag_ids
+            ),
+            ignore_conflicts=True
+        )
+        Mention.objects.bulk_create(
+            (
+                Mention(user_id=user_id, post=post, pub_date=post.pub_date)
+                for user_id in user_ids
+            ),
+            ignore_conflicts=True
+        )
+
+
+def index_all_posts(batch_size=500):
+    """Индексирует все существующие посты пачками по id и после каждой
+    пачки отдаёт количество обработанных постов."""
+    last_id = 0
+    while True:
+        posts = list(
+            Post.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'text', 'pub_date')[:batch_size]
+        )
+        if not posts:
+            return
+        last_id = posts[-1][0]
+        parsed = [
+            (post_id, pub_date, extract_tags(text), extract_mentions(text))
+            for post_id, text, pub_date in posts
+        ]
+        tag_ids = get_tag_ids(set().union(*(item[2] for item in parsed)))
+        user_ids = get_user_ids(set().union(*(item[3] for item in parsed)))
+        with transaction.atomic():
+            PostTag.objects.bulk_create(
+                (
+                    PostTag(
+                        tag_id=tag_ids[name], post_id=post_id,
+                        pub_date=pub_date
+                    )
+                    for post_id, pub_date, tags, _ in parsed
+                    for name in tags
+                ),
+                batch_size=batch_size,
+                ignore_conflicts=True
+            )
+            Mention.objects.bulk_create(
+                (
+                    Mention(
+                        user_id=user_ids[name], post_id=post_id,
+                        pub_date=pub_date
+                    )
+                    for post_id, pub_date, _, names in parsed
+                    for name in names if name in user_ids
+                ),
+                batch_size=batch_size,
+                ignore_conflicts=True
+            )
+        yield len(posts)
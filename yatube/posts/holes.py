@@ -0,0 +1,134 @@
+"""Персональные «дырки» в общих страницах.
+
+Кнопки подписки и редактирования, форма комментария, меню и шапка
+зависят от того, кто смотрит страницу. Каждый такой кусок — отдельный
+шаблон include/holes/<имя>.html, который видит зрителя только как
+переменную viewer. Тег {% hole %} рисует его сразу для текущего
+пользователя, а на странице, которая уходит в общий кэш (shared_page),
+рисует вариант для анонима и обрамляет его метками с именем и
+аргументами. HolePunchMiddleware для вошедшего пользователя находит
+метки в ответе — и в свежем, и в взятом из кэша — и перерисовывает
+только эти куски."""
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from django.contrib.auth.models import AnonymousUser
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from yatube.settings import SUGGESTIONS_PER_PAGE
+
+from .follow_cache import followed_among, is_following
+from .forms import CommentForm
+from .models import FollowSuggestion
+
+HOLE = re.compile(r'<!--hole:(\w+)\?([^>]*)-->.*?<!--/hole-->', re.S)
+
+
+def follow_context(viewer, author_id, **args):
+    if not viewer.is_authenticated:
+        return {}
+    return {'follows': is_following(viewer, int(author_id))}
+
+
+def comment_form_context(viewer, **args):
+    return {'form': CommentForm()}
+
+
+def follow_suggestions(user):
+    """Рекомендации без тех, на кого пользователь уже подписался с
+    прошлого пересчёта: одна проверка по набору подписок на всех."""
+    if not user.is_authenticated:
+        return []
+    suggestions = list(
+        FollowSuggestion.objects.filter(user=user).select_related(
+            'suggested'
+        )[:SUGGESTIONS_PER_PAGE * 2]
+    )
+    followed = followed_among(
+        user, [suggestion.suggested_id for suggestion in suggestions]
+    )
+    return [
+        suggestion for suggestion in suggestions
+        if suggestion.suggested_id not in followed
+    ][:SUGGESTIONS_PER_PAGE]
+
+
+def suggestions_context(viewer, **args):
+    return {'suggestions': follow_suggestions(viewer)}
+
+
+# Имя дырки -> функция, добавляющая в контекст данные зрителя:
+HOLES = {
+    'nav': None,
+    'menu': None,
+    'post_actions': None,
+    'follow': follow_context,
+    'comment_form': comment_form_context,
+    'suggestions': suggestions_context,
+}
+
+
+def hole_args(args):
+    """Аргументы одинаково выглядят в обоих проходах: строки, а
+    ложные значения — пустая строка."""
+    prepared = {}
+    for name, value in args.items():
+        if value is True:
+            value = 1
+        prepared[name] = str(value) if value else ''
+    return prepared
+
+
+def render_hole(request, viewer, name, args):
+    context = {'viewer': viewer, **args}
+    if HOLES[name] is not None:
+        context.update(HOLES[name](viewer, **args))
+    return render_to_string(
+        f'include/holes/{name}.html', context,
+        request if viewer.is_authenticated else None
+    )
+
+
+def hole(request, name, args):
+    args = hole_args(args)
+    if request is None:
+        return mark_safe(render_hole(None, AnonymousUser(), name, args))
+    if not getattr(request, 'shared_page', False):
+        return mark_safe(render_hole(request, request.user, name, args))
+    html = render_hole(request, AnonymousUser(), name, args)
+    return mark_safe(
+        f'<!--hole:{name}?{urlencode(args)}-->{html}<!--/hole-->'
+    )
+
+
+def fill_holes(request, html):
+    return HOLE.sub(
+        lambda match: render_hole(
+            request, request.user, match.group(1),
+            dict(parse_qsl(match.group(2), keep_blank_values=True))
+        ),
+        html
+    )
+
+
+class HolePunchMiddleware:
+    """Второй проход по общей странице: вместо анонимных вариантов
+    дырок — куски для вошедшего пользователя. Анонимам страница
+    отдаётся как есть."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (not request.user.is_authenticated
+                or 'text/html' not in response.get('Content-Type', '')):
+            return response
+        if response.streaming:
+            response.streaming_content = (
+                fill_holes(request, chunk.decode()).encode()
+                for chunk in response.streaming_content
+            )
+        elif b'<!--hole:' in response.content:
+            response.content = fill_holes(request, response.content.decode())
+        return response
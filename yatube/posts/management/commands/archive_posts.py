@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts.archive import archive_posts
+from yatube.stampede import is_process_local
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше заданного возраста вместе с комментариями '
+        'в архивные таблицы небольшими пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='Посты старше этого количества дней уходят в архив.'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пачками, чтобы не держать базу занятой.'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('Параметры должны быть положительными.')
+        if is_process_local(cache):
+            raise CommandError(
+                'Кэш живёт в памяти процесса (LocMemCache): новая версия '
+                'архива здесь не дойдёт до сайта, и он ещё час будет '
+                'считать ленты по старым счётчикам. Настройте общий кэш.'
+            )
+        before = timezone.now() - timedelta(days=options['days'])
+        total = 0
+        for moved in archive_posts(
+            before, options['batch_size'], options['pause']
+        ):
+            total += moved
+            self.stdout.write(f'В архиве: {total}')
+        self.stdout.write(self.style.SUCCESS(f'Перенесено постов: {total}'))
@@ -0,0 +1,51 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from posts.feeds import index_feed, model_rows
+from posts.read_models import feed_rows
+
+MODES = {
+    'models': model_rows,
+    'rows': feed_rows,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает расход памяти и процессора на страницу ленты для '
+        'полных экземпляров моделей и лёгких строк из read_models.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=50)
+        parser.add_argument('--page-size', type=int, default=10)
+
+    def handle(self, *args, **options):
+        for mode, rows in MODES.items():
+            cpu, peak = self.run_mode(rows, options)
+            pages = options['pages']
+            self.stdout.write(
+                f'{mode:>6}: '
+                f'процессор {cpu / pages * 1000:7.2f} мс/страница, '
+                f'пик памяти {peak / 1024:8.1f} КиБ на страницу'
+            )
+
+    def run_mode(self, rows, options):
+        feed = index_feed()
+        feed.rows = rows
+        size = options['page_size']
+        cpu = 0.0
+        peak = 0
+        for page in range(options['pages']):
+            start = page * size
+            tracemalloc.start()
+            began = time.process_time()
+            items = feed[start:start + size]
+            cpu += time.process_time() - began
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            if not items:
+                break
+        return cpu, peak
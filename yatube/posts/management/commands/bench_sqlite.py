@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from yatube.sqlite_wal.base import DEFAULT_PRAGMAS, apply_pragmas
+
+MODES = {
+    'rollback': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+    'wal': DEFAULT_PRAGMAS,
+}
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'author_id INTEGER NOT NULL, '
+    'text TEXT NOT NULL, '
+    'pub_date REAL NOT NULL)'
+)
+INDEX = 'CREATE INDEX post_pub_date ON post (pub_date)'
+
+
+class Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {'writes': 0, 'reads': 0, 'locked': 0}
+
+    def add(self, key):
+        with self.lock:
+            self.values[key] += 1
+
+
+def connect(path, pragmas, timeout):
+    connection = sqlite3.connect(
+        path, timeout=timeout, isolation_level=None, check_same_thread=False
+    )
+    apply_pragmas(connection, pragmas)
+    return connection
+
+
+def writer(connection, deadline, counter):
+    while time.monotonic() < deadline:
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'INSERT INTO post (author_id, text, pub_date) '
+                'VALUES (?, ?, ?)',
+                (1, 'benchmark ' * 20, time.time())
+            )
+            connection.execute('COMMIT')
+            counter.add('writes')
+        except sqlite3.OperationalError:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            counter.add('locked')
+    connection.close()
+
+
+def reader(connection, deadline, counter):
+    while time.monotonic() < deadline:
+        try:
+            connection.execute(
+                'SELECT id, author_id, text, pub_date FROM post '
+                'ORDER BY pub_date DESC LIMIT 5'
+            ).fetchall()
+            counter.add('reads')
+        except sqlite3.OperationalError:
+            counter.add('locked')
+    connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность параллельных записей и чтений '
+        'SQLite в режиме rollback-журнала и в WAL с настроенными прагмами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument(
+            '--timeout', type=float, default=0.1,
+            help='Сколько секунд соединение ждёт снятия блокировки.'
+        )
+
+    def handle(self, *args, **options):
+        for mode, pragmas in MODES.items():
+            values = self.run_mode(pragmas, options)
+            seconds = options['seconds']
+            self.stdout.write(
+                f'{mode:>8}: '
+                f'записей {values["writes"] / seconds:9.1f}/с, '
+                f'чтений {values["reads"] / seconds:9.1f}/с, '
+                f'ошибок блокировки {values["locked"]}'
+            )
+
+    def run_mode(self, pragmas, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            connection = connect(path, pragmas, options['timeout'])
+            connection.execute(SCHEMA)
+            connection.execute(INDEX)
+            connection.close()
+
+            # Соединения открываем заранее, пока никто не пишет:
+            # в замер должна попасть только нагрузка, а не прагмы.
+            counter = Counter()
+            workers = [writer] * options['writers']
+            workers += [reader] * options['readers']
+            connections = [
+                connect(path, pragmas, options['timeout']) for _ in workers
+            ]
+            deadline = time.monotonic() + options['seconds']
+            threads = [
+                threading.Thread(
+                    target=target, args=(connection, deadline, counter)
+                )
+                for target, connection in zip(workers, connections)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return counter.values
@@ -0,0 +1,33 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from yatube.stampede import is_process_local
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает, сколько раз кэш пересчитывал истёкшие ключи (из них '
+        'досрочно) и сколько запросов на это время получили старое '
+        'значение вместо собственного пересчёта. Работает только с общим '
+        'для процессов кэшем: счётчики LocMemCache команде не видны.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true', help='Обнулить счётчики.'
+        )
+
+    def handle(self, *args, **options):
+        if not hasattr(cache, 'metrics'):
+            self.stderr.write('Кэш по умолчанию не StampedeCache.')
+            return
+        if is_process_local(cache):
+            raise CommandError(
+                'Счётчики лежат в памяти веб-процессов (LocMemCache), '
+                'отсюда их не прочитать. Настройте общий кэш в '
+                "CACHES['default']['OPTIONS']['CACHE']."
+            )
+        for name, value in cache.metrics().items():
+            self.stdout.write(f'{name}: {value}')
+        if options['reset']:
+            cache.reset_metrics()
@@ -0,0 +1,55 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.account_deletion import next_deletion, run_deletion
+from yatube.stampede import is_process_local
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет аккаунты из очереди AccountDeletion пачками, продолжая '
+        'с сохранённого этапа. С --loop работает как постоянный воркер.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пачками, чтобы не держать базу занятой.'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, когда очередь опустела.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Пауза в секундах, когда удалять некого.'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        if is_process_local(cache):
+            raise CommandError(
+                'Кэш живёт в памяти процесса (LocMemCache): сброс подписок '
+                'и лент здесь не дойдёт до сайта. Настройте общий кэш.'
+            )
+        while True:
+            deletion = next_deletion()
+            if deletion is None:
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            for deleted in run_deletion(
+                deletion, options['chunk_size'], options['pause']
+            ):
+                self.stdout.write(
+                    f'{deletion.username}: этап {deletion.stage}, '
+                    f'удалено строк {deleted}'
+                )
+            self.stdout.write(
+                self.style.SUCCESS(f'Аккаунт {deletion.username} удалён')
+            )
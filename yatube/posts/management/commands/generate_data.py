@@ -0,0 +1,305 @@
+import multiprocessing
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.text import make_excerpt, render_text
+
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua enim ad minim '
+    'veniam quis nostrud exercitation ullamco laboris nisi aliquip ex ea '
+    'commodo consequat duis aute irure in reprehenderit voluptate velit '
+    'esse cillum fugiat nulla pariatur excepteur sint occaecat cupidatat '
+    'non proident sunt culpa qui officia deserunt mollit anim id est '
+    'laborum'
+).split()
+
+IMAGE_STUB_NAME = 'posts/generated_stub.gif'
+IMAGE_STUB = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+# SQLite собирает пачку INSERT из UNION ALL, а в нём не больше 500 частей:
+SQLITE_MAX_BATCH = 500
+
+# Состояние, которое наследуют дочерние процессы после fork:
+_shared = {}
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Временно отключаем auto_now_add, чтобы bulk_create не затирал
+    сгенерированные даты текущим временем."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def chunk_seed(seed, kind, index):
+    return f'{seed}:{kind}:{index}'
+
+
+def random_text(rng, min_words, max_words):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize() + '.'
+
+
+def random_date(rng, now, days):
+    return now - timedelta(seconds=rng.randrange(days * 24 * 60 * 60))
+
+
+def build_posts(rng, count, options):
+    now = timezone.now()
+    user_ids = _shared['user_ids']
+    group_ids = _shared['group_ids']
+    for _ in range(count):
+        group_id = None
+        if group_ids and rng.random() < options['group_ratio']:
+            group_id = rng.choice(group_ids)
+        image = None
+        if rng.random() < options['image_ratio']:
+            image = IMAGE_STUB_NAME
+        text = random_text(rng, 5, 80)
+        yield Post(
+            text=text,
+            text_html=render_text(text),
+            excerpt=make_excerpt(text),
+            pub_date=random_date(rng, now, options['days']),
+            author_id=rng.choice(user_ids),
+            group_id=group_id,
+            image=image,
+        )
+
+
+def build_comments(rng, count, options):
+    now = timezone.now()
+    user_ids = _shared['user_ids']
+    post_ids = _shared['post_ids']
+    for _ in range(count):
+        text = random_text(rng, 2, 30)
+        yield Comment(
+            text=text,
+            text_html=render_text(text),
+            created=random_date(rng, now, options['days']),
+            author_id=rng.choice(user_ids),
+            post_id=rng.choice(post_ids),
+        )
+
+
+def build_follows(rng, count, options):
+    user_ids = _shared['user_ids']
+    popular = _shared['popular_ids']
+    cum_weights = _shared['cum_weights']
+    for _ in range(count):
+        user_id = rng.choice(user_ids)
+        author_id = rng.choices(popular, cum_weights=cum_weights)[0]
+        if user_id != author_id:
+            yield Follow(user_id=user_id, author_id=author_id)
+
+
+BUILDERS = {
+    'posts': (Post, build_posts),
+    'comments': (Comment, build_comments),
+    'follows': (Follow, build_follows),
+}
+
+
+def effective_batch_size(batch_size):
+    if connection.vendor == 'sqlite':
+        return min(batch_size, SQLITE_MAX_BATCH)
+    return batch_size
+
+
+def run_chunk(task):
+    """Генерирует и записывает один кусок данных; выполняется как в
+    основном процессе, так и в воркерах пула."""
+    kind, index, count, options = task
+    model, builder = BUILDERS[kind]
+    rng = random.Random(chunk_seed(options['seed'], kind, index))
+    objects = builder(rng, count, options)
+    batch_size = effective_batch_size(options['batch_size'])
+    with explicit_dates(
+        Post._meta.get_field('pub_date'),
+        Comment._meta.get_field('created'),
+    ):
+        with transaction.atomic():
+            model.objects.bulk_create(
+                objects, batch_size=batch_size, ignore_conflicts=True
+            )
+    return count
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками для нагрузочного тестирования.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=30000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--chunk-size', type=int, default=50000,
+            help='Сколько объектов генерирует одна задача воркера.'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Количество процессов для генерации постов, комментариев '
+                 'и подписок.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней разбросать даты публикаций.'
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.0,
+            help='Доля постов с картинкой-заглушкой (от 0 до 1).'
+        )
+        parser.add_argument('--group-ratio', type=float, default=0.6)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель распределения Ципфа для популярности авторов.'
+        )
+        parser.add_argument(
+            '--prefix', default='gen',
+            help='Префикс имён сгенерированных пользователей и групп.'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        if options['batch_size'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('Размеры пачек должны быть положительными.')
+        started = time.monotonic()
+        rng = random.Random(options['seed'])
+
+        self.create_users(options)
+        self.create_groups(options)
+        prefix = options['prefix']
+        _shared['user_ids'] = list(
+            User.objects.filter(username__startswith=f'{prefix}_')
+            .order_by('id').values_list('id', flat=True)
+        )
+        _shared['group_ids'] = list(
+            Group.objects.filter(slug__startswith=f'{prefix}-')
+            .order_by('id').values_list('id', flat=True)
+        )
+        if options['image_ratio'] > 0:
+            self.create_image_stub()
+
+        self.run_tasks('posts', options)
+        _shared['post_ids'] = list(
+            Post.objects.order_by('id').values_list('id', flat=True)
+        )
+        popular = _shared['user_ids'][:]
+        rng.shuffle(popular)
+        _shared['popular_ids'] = popular
+        _shared['cum_weights'] = list(accumulate(
+            1 / rank ** options['zipf'] for rank in range(1, len(popular) + 1)
+        ))
+        if _shared['post_ids']:
+            self.run_tasks('comments', options)
+        self.run_tasks('follows', options)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с.'
+        ))
+
+    def create_users(self, options):
+        # Хэшируем пароль один раз: PBKDF2 на каждого пользователя
+        # занял бы больше времени, чем вся остальная генерация.
+        password = make_password(f'{options["prefix"]}-password')
+        prefix = options['prefix']
+        users = (
+            User(
+                username=f'{prefix}_{i}',
+                first_name=f'Имя{i}',
+                last_name=f'Фамилия{i}',
+                email=f'{prefix}_{i}@example.com',
+                password=password,
+            )
+            for i in range(options['users'])
+        )
+        with transaction.atomic():
+            User.objects.bulk_create(
+                users,
+                batch_size=effective_batch_size(options['batch_size']),
+                ignore_conflicts=True,
+            )
+        self.stdout.write(f'Пользователи: {options["users"]}')
+
+    def create_groups(self, options):
+        prefix = options['prefix']
+        groups = (
+            Group(
+                title=f'Группа {i}',
+                slug=f'{prefix}-group-{i}',
+                description=f'Сгенерированная группа номер {i}',
+            )
+            for i in range(options['groups'])
+        )
+        with transaction.atomic():
+            Group.objects.bulk_create(
+                groups,
+                batch_size=effective_batch_size(options['batch_size']),
+                ignore_conflicts=True,
+            )
+        self.stdout.write(f'Группы: {options["groups"]}')
+
+    def create_image_stub(self):
+        if not default_storage.exists(IMAGE_STUB_NAME):
+            default_storage.save(IMAGE_STUB_NAME, ContentFile(IMAGE_STUB))
+
+    def run_tasks(self, kind, options):
+        total = options[kind]
+        chunk_size = options['chunk_size']
+        payload = {
+            key: options[key]
+            for key in (
+                'seed', 'batch_size', 'days', 'image_ratio', 'group_ratio'
+            )
+        }
+        tasks = [
+            (kind, index, min(chunk_size, total - start), payload)
+            for index, start in enumerate(range(0, total, chunk_size))
+        ]
+        started = time.monotonic()
+        if options['workers'] > 1 and len(tasks) > 1:
+            # Соединения с БД нельзя делить между процессами:
+            # закрываем их, и каждый воркер откроет своё.
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(options['workers']) as pool:
+                for _ in pool.imap_unordered(run_chunk, tasks):
+                    pass
+        else:
+            for task in tasks:
+                run_chunk(task)
+        self.stdout.write(
+            f'{kind}: {total} за {time.monotonic() - started:.1f} с.'
+        )
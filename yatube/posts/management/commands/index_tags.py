@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.hashtags import index_all_posts
+
+
+class Command(BaseCommand):
+    help = 'Заполняет индекс хэштегов и упоминаний для уже написанных постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = 0
+        for processed in index_all_posts(options['batch_size']):
+            total += processed
+            self.stdout.write(f'Обработано постов: {total}')
+        self.stdout.write(self.style.SUCCESS('Индекс хэштегов готов.'))
@@ -0,0 +1,53 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.moderation import next_job, run_job
+from yatube.stampede import is_process_local
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задания массовой модерации из очереди ModerationJob '
+        'пачками. С --loop работает как постоянный воркер.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пачками, чтобы не держать базу занятой.'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, когда очередь опустела.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Пауза в секундах, когда заданий нет.'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        if is_process_local(cache):
+            raise CommandError(
+                'Кэш живёт в памяти процесса (LocMemCache): сброс карточек, '
+                'лент и страниц здесь не дойдёт до сайта, и он ещё минуты '
+                'будет показывать скрытое. Настройте общий кэш.'
+            )
+        while True:
+            job = next_job()
+            if job is None:
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            for processed in run_job(
+                job, options['chunk_size'], options['pause']
+            ):
+                self.stdout.write(
+                    f'Задание {job.pk}: {processed} из {job.total}'
+                )
+            self.stdout.write(self.style.SUCCESS(f'Задание {job.pk} готово'))
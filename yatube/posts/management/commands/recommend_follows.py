@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import compute_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «на кого подписаться» по графу '
+        'подписок (друзья друзей и совместные подписки).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=10,
+            help='Сколько рекомендаций хранить на пользователя.'
+        )
+        parser.add_argument('--block-size', type=int, default=1000)
+        parser.add_argument('--cofollow-weight', type=float, default=0.25)
+        parser.add_argument(
+            '--cofollow-limit', type=int, default=50,
+            help='Сколько подписчиков автора учитывать для совместных '
+                 'подписок (ограничивает взрыв на популярных авторах).'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = 0
+        for processed in compute_suggestions(
+            limit=options['limit'],
+            block_size=options['block_size'],
+            cofollow_weight=options['cofollow_weight'],
+            cofollow_limit=options['cofollow_limit'],
+        ):
+            total += processed
+            self.stdout.write(f'Пользователей: {total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с.'
+        ))
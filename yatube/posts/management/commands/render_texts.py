@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+from posts.text import make_excerpt, render_text
+
+
+def render_rows(model, batch_size, with_excerpt):
+    """Заполняет text_html (и excerpt) пачками по id и отдаёт количество
+    обработанных строк после каждой пачки."""
+    fields = ['text_html', 'excerpt'] if with_excerpt else ['text_html']
+    last_id = 0
+    while True:
+        rows = list(
+            model.objects.filter(id__gt=last_id).order_by('id')
+            .only('id', 'text')[:batch_size]
+        )
+        if not rows:
+            return
+        last_id = rows[-1].id
+        for row in rows:
+            row.text_html = render_text(row.text)
+            if with_excerpt:
+                row.excerpt = make_excerpt(row.text)
+        with transaction.atomic():
+            model.objects.bulk_update(rows, fields)
+        yield len(rows)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее рендерит HTML текста (и краткий анонс) для постов и '
+        'комментариев, сохранённых до появления этих полей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for model, with_excerpt in (
+            (Post, True),
+            (Comment, False),
+            (ArchivedPost, True),
+            (ArchivedComment, False),
+        ):
+            total = 0
+            for processed in render_rows(
+                model, options['batch_size'], with_excerpt
+            ):
+                total += processed
+            self.stdout.write(f'{model.__name__}: {total}')
+        self.stdout.write(self.style.SUCCESS('Тексты отрендерены.'))
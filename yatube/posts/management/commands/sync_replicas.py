@@ -0,0 +1,61 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в файлы реплик из DATABASE_REPLICAS '
+        '(онлайн-бэкап, запись в основную базу не блокируется). С --loop '
+        'повторяет копирование каждые REPLICA_PIN_SECONDS секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а обновлять реплики по кругу.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help='Пауза между копированиями, по умолчанию '
+                 'REPLICA_PIN_SECONDS.'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены (DATABASE_REPLICAS).')
+        interval = options['interval']
+        if interval is None:
+            interval = settings.REPLICA_PIN_SECONDS
+        if options['loop'] and interval > settings.REPLICA_PIN_SECONDS:
+            # Реплика отстаёт на интервал плюс время копирования; если это
+            # дольше закрепления, автор перестанет видеть свои записи.
+            raise CommandError(
+                'Интервал больше REPLICA_PIN_SECONDS: после окончания '
+                'закрепления клиент прочитает с реплики устаревшие данные.'
+            )
+        while True:
+            started = time.monotonic()
+            self.sync()
+            if not options['loop']:
+                return
+            time.sleep(max(interval - (time.monotonic() - started), 0))
+
+    def sync(self):
+        source_path = connections['default'].settings_dict['NAME']
+        source = sqlite3.connect(source_path)
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                connections[alias].close()
+                target_path = connections[alias].settings_dict['NAME']
+                target = sqlite3.connect(target_path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: {target_path}')
+        finally:
+            source.close()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import rebuild_buckets, update_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает топ постов и групп «в тренде» по накопленным '
+        'счётчикам активности. Рассчитан на запуск по расписанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Сначала пересобрать счётчики из комментариев и постов.'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rebuild_buckets()
+        update_trending()
+        self.stdout.write(self.style.SUCCESS('Тренды обновлены.'))
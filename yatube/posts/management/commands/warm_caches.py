@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.warmup import fetch_local, http_fetcher, warm, warm_urls
+from yatube.stampede import is_process_local
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэши после выкладки: открывает первые страницы '
+        'главной, всех групп, самых активных профилей и посты. Без --url '
+        'страницы рендерятся в этом процессе — это работает только с '
+        'общим кэшем; с --url запрашиваются у запущенного сайта.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=3,
+            help='Сколько первых страниц каждой ленты прогреть.'
+        )
+        parser.add_argument('--profiles', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=50)
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Сколько страниц запрашивать одновременно.'
+        )
+        parser.add_argument(
+            '--url', help='Адрес сайта, например http://127.0.0.1:8000'
+        )
+
+    def handle(self, *args, **options):
+        if options['pages'] < 1 or options['concurrency'] < 1:
+            raise CommandError(
+                'Число страниц и потоков должно быть положительным.'
+            )
+        if not options['url'] and is_process_local(cache):
+            raise CommandError(
+                'Кэш живёт в памяти процесса (LocMemCache): прогретое '
+                'здесь пропадёт вместе с командой. Укажите --url '
+                'запущенного сайта или настройте общий кэш.'
+            )
+        urls = warm_urls(
+            options['pages'], options['profiles'], options['posts']
+        )
+        fetch = http_fetcher(options['url']) if options['url'] else fetch_local
+        failed = 0
+        total = 0.0
+        for url, status, seconds in warm(
+            urls, fetch, options['concurrency']
+        ):
+            total += seconds
+            if status != 200:
+                failed += 1
+                self.stderr.write(f'{status} {url}')
+            elif options['verbosity'] > 1:
+                self.stdout.write(f'{status} {url} {seconds * 1000:.0f} мс')
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето страниц: {len(urls) - failed} из {len(urls)}, '
+            f'суммарно {total:.1f} с'
+        ))
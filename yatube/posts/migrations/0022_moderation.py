@@ -0,0 +1,45 @@
+# Generated by Django 2.2.6 on 2026-10-19 10:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0021_comment_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='скрыт модерацией'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='скрыт модерацией'),
+        ),
+        migrations.CreateModel(
+            name='ModerationJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('delete', 'Удалить'), ('hide', 'Скрыть')], max_length=10)),
+                ('scope', models.CharField(choices=[('posts', 'Посты'), ('comments', 'Комментарии'), ('all', 'Всё')], default='all', max_length=10)),
+                ('since', models.DateTimeField(blank=True, null=True, verbose_name='начиная с')),
+                ('until', models.DateTimeField(blank=True, null=True, verbose_name='до')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='queued', editable=False, max_length=10)),
+                ('total', models.PositiveIntegerField(default=0, editable=False)),
+                ('processed', models.PositiveIntegerField(default=0, editable=False)),
+                ('error', models.TextField(blank=True, editable=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('authors', models.ManyToManyField(blank=True, related_name='moderation_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
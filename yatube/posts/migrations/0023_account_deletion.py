@@ -0,0 +1,40 @@
+# Generated by Django 2.2.6 on 2026-10-19 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_moderation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDeletion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField(unique=True)),
+                ('username', models.CharField(max_length=150)),
+                ('stage', models.CharField(blank=True, max_length=30)),
+                ('last_id', models.IntegerField(default=0)),
+                ('deleted', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'В процессе'), ('done', 'Готово')], default='pending', max_length=10)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created'],
+            },
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='скрыт модерацией'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='скрыт модерацией'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='moderationjob',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Готовится'), ('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='queued', editable=False, max_length=10),
+        ),
+    ]
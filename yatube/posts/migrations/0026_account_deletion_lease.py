@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_moderation_draft'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountdeletion',
+            name='leased_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
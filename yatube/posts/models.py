@@ -2,6 +2,9 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils.text import slugify
 
+from .storage import post_images
+from .text import make_excerpt, render_text
+
 User = get_user_model()
 
 
@@ -19,9 +22,21 @@ class Group(models.Model):
         return super().save(*args, **kwargs)
 
 
+class VisibleManager(models.Manager):
+    """Менеджер по умолчанию: скрытое модерацией не попадает ни в ленты,
+    ни в related-менеджеры вроде author.posts. Всё подряд — all_objects."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_hidden=False)
+
+
 class Post(models.Model):
     text = models.TextField()
-    pub_date = models.DateTimeField('date published', auto_now_add=True)
+    text_html = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=200, blank=True, editable=False)
+    pub_date = models.DateTimeField(
+        'date published', auto_now_add=True, db_index=True
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -34,7 +49,16 @@ class Post(models.Model):
         blank=True,
         related_name='posts'
     )
-    image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    image = models.ImageField(
+        upload_to='posts/', storage=post_images, blank=True, null=True,
+        db_index=True
+    )
+    is_hidden = models.BooleanField('скрыт модерацией', default=False)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
+
+    is_archived = False
 
     class Meta:
         ordering = ['-pub_date']
@@ -42,6 +66,16 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        self.text_html = render_text(self.text)
+        self.excerpt = make_excerpt(self.text)
+        return super().save(*args, **kwargs)
+
+    @property
+    def comment_count(self):
+        # В лентах счётчик приходит готовым из read_models.
+        return self.comments.count()
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -55,11 +89,22 @@ class Comment(models.Model):
         related_name='comments'
     )
     text = models.TextField()
-    created = models.DateTimeField('date published', auto_now_add=True)
+    text_html = models.TextField(blank=True, editable=False)
+    created = models.DateTimeField(
+        'date published', auto_now_add=True, db_index=True
+    )
+    is_hidden = models.BooleanField('скрыт модерацией', default=False)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        self.text_html = render_text(self.text)
+        return super().save(*args, **kwargs)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -80,3 +125,265 @@ class Follow(models.Model):
                 name='unique_list'
             )
         ]
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из posts_post командой archive_posts.
+    Хранит тот же id, что был у поста, поэтому ссылки не ломаются."""
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField()
+    text_html = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=200, blank=True, editable=False)
+    pub_date = models.DateTimeField('date published', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_posts'
+    )
+    image = models.ImageField(
+        upload_to='posts/', storage=post_images, blank=True, null=True,
+        db_index=True
+    )
+    archived = models.DateTimeField(auto_now_add=True)
+    is_hidden = models.BooleanField('скрыт модерацией', default=False)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
+
+    is_archived = True
+
+    class Meta:
+        ordering = ['-pub_date']
+
+    def __str__(self):
+        return self.text[:15]
+
+    @property
+    def comment_count(self):
+        # В лентах счётчик приходит готовым из read_models.
+        return self.comments.count()
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments'
+    )
+    text = models.TextField()
+    text_html = models.TextField(blank=True, editable=False)
+    created = models.DateTimeField('date published')
+    is_hidden = models.BooleanField('скрыт модерацией', default=False)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
+
+    def __str__(self):
+        return self.text
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class PostTag(models.Model):
+    """Связь поста с хэштегом. Дата поста продублирована сюда, чтобы
+    лента тега читалась одним проходом по индексу (tag, pub_date)."""
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('tag', 'post'),
+                name='unique_post_tag'
+            )
+        ]
+        indexes = [models.Index(fields=('tag', '-pub_date'))]
+
+
+class Mention(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_mention'
+            )
+        ]
+        indexes = [models.Index(fields=('user', '-pub_date'))]
+
+
+class ActivityBucket(models.Model):
+    """Счётчик активности объекта за один временной интервал: комментарии
+    к посту или новые посты в группе. Из них считается «в тренде»."""
+    POST = 'post'
+    GROUP = 'group'
+    KIND_CHOICES = ((POST, 'Пост'), (GROUP, 'Группа'))
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    bucket = models.DateTimeField(db_index=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('kind', 'object_id', 'bucket'),
+                name='unique_activity_bucket'
+            )
+        ]
+
+
+class TrendingList(models.Model):
+    """Заранее посчитанный топ в виде JSON, который страницы читают
+    целиком одной строкой."""
+    kind = models.CharField(
+        max_length=10,
+        primary_key=True,
+        choices=ActivityBucket.KIND_CHOICES
+    )
+    items = models.TextField(default='[]')
+    updated = models.DateTimeField(auto_now=True)
+
+
+class FollowSuggestion(models.Model):
+    """Рекомендация «на кого подписаться», посчитанная командой
+    recommend_follows по графу подписок."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions'
+    )
+    suggested = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggested_to'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'suggested'),
+                name='unique_follow_suggestion'
+            )
+        ]
+
+
+class ModerationJob(models.Model):
+    """Массовое удаление или скрытие постов и комментариев выбранных
+    авторов и/или за промежуток времени. Выполняется воркером
+    manage.py moderate пачками; processed показывает прогресс."""
+    DELETE = 'delete'
+    HIDE = 'hide'
+    ACTION_CHOICES = ((DELETE, 'Удалить'), (HIDE, 'Скрыть'))
+    POSTS = 'posts'
+    COMMENTS = 'comments'
+    ALL = 'all'
+    SCOPE_CHOICES = (
+        (POSTS, 'Посты'), (COMMENTS, 'Комментарии'), (ALL, 'Всё')
+    )
+    DRAFT = 'draft'
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (DRAFT, 'Готовится'),
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    scope = models.CharField(
+        max_length=10, choices=SCOPE_CHOICES, default=ALL
+    )
+    authors = models.ManyToManyField(
+        User, blank=True, related_name='moderation_jobs'
+    )
+    since = models.DateTimeField('начиная с', null=True, blank=True)
+    until = models.DateTimeField('до', null=True, blank=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=QUEUED,
+        editable=False
+    )
+    total = models.PositiveIntegerField(default=0, editable=False)
+    processed = models.PositiveIntegerField(default=0, editable=False)
+    error = models.TextField(blank=True, editable=False)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['-created']
+
+    def __str__(self):
+        return f'{self.get_action_display()} {self.get_scope_display()}'
+
+
+class AccountDeletion(models.Model):
+    """Удаление аккаунта по шагам. Пользователь сразу деактивирован, а
+    его записи скрыты; воркер manage.py delete_accounts удаляет связанные
+    строки пачками и после каждой пачки сохраняет этап и последний id,
+    чтобы после сбоя продолжить с того же места."""
+    PENDING = 'pending'
+    DONE = 'done'
+    STATUS_CHOICES = ((PENDING, 'В процессе'), (DONE, 'Готово'))
+
+    user_id = models.IntegerField(unique=True)
+    username = models.CharField(max_length=150)
+    stage = models.CharField(max_length=30, blank=True)
+    last_id = models.IntegerField(default=0)
+    deleted = models.PositiveIntegerField(default=0)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING
+    )
+    # До этого момента удаление принадлежит взявшему его воркеру:
+    leased_until = models.DateTimeField(null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created']
+
+    def __str__(self):
+        return f'Удаление {self.username}'
@@ -0,0 +1,184 @@
+"""Массовая модерация.
+
+Задание ModerationJob выбирает посты и/или комментарии по авторам и
+промежутку времени и обрабатывает их пачками по id: каждая пачка — одна
+короткая транзакция с UPDATE или DELETE по списку id, без загрузки
+объектов и сигналов на каждую строку. После пачки сбрасываются карточки
+затронутых постов и ленты подписчиков их авторов, после всего задания —
+пересчитывается «в тренде». Сбрасывает кэши сам воркер, поэтому ему
+нужен общий с сайтом кэш — см. команду moderate."""
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_image
+from sorl.thumbnail.images import ImageFile
+
+from .feed_cache import card_key, forget_follower_feeds
+from .models import (ActivityBucket, ArchivedComment, ArchivedPost, Comment,
+                     ModerationJob, Post)
+from .page_cache import forget_pages
+from .renditions import forget_renditions
+from .trending import update_trending
+
+
+def image_references(name):
+    """Сколько постов, живых и архивных, ссылается на файл картинки."""
+    return (
+        Post.all_objects.filter(image=name).count()
+        + ArchivedPost.all_objects.filter(image=name).count()
+    )
+
+
+def delete_images(names):
+    """Удаляет картинки, на которые больше не ссылается ни один пост,
+    вместе с миниатюрами sorl-thumbnail. Одинаковые загрузки хранятся
+    одним файлом (storage.py), поэтому удаление поста ещё не значит,
+    что его картинка никому не нужна."""
+    storage = Post._meta.get_field('image').storage
+    for name in set(names):
+        try:
+            storage.path(name)
+        except SuspiciousFileOperation:
+            # Путь вне MEDIA_ROOT: файл не из загрузок, трогать его нельзя.
+            continue
+        if image_references(name):
+            continue
+        # Только что отданный новой загрузке файл release не тронет: её
+        # пост, возможно, ещё не закоммичен, и счёт ссылок его не видит.
+        if storage.release(name):
+            delete_image(ImageFile(name, storage), delete_file=False)
+            forget_renditions(name)
+
+
+def job_targets(job):
+    """Пары (модель, queryset) в порядке обработки: сначала комментарии,
+    потом посты, чтобы удаление постов не делало лишней работы. Архивные
+    таблицы обрабатываются наравне со свежими: TieredFeed показывает и
+    их. Задание без авторов и без промежутка не выполняется."""
+    author_ids = list(job.authors.values_list('id', flat=True))
+    if not (author_ids or job.since or job.until):
+        raise ValueError(
+            f'Задание {job.pk} без авторов и промежутка времени затронуло '
+            f'бы весь сайт.'
+        )
+    targets = []
+    if job.scope in (ModerationJob.COMMENTS, ModerationJob.ALL):
+        targets += [(Comment, 'created'), (ArchivedComment, 'created')]
+    if job.scope in (ModerationJob.POSTS, ModerationJob.ALL):
+        targets += [(Post, 'pub_date'), (ArchivedPost, 'pub_date')]
+    for model, date_field in targets:
+        queryset = model.all_objects.all()
+        if author_ids:
+            queryset = queryset.filter(author_id__in=author_ids)
+        if job.since:
+            queryset = queryset.filter(**{f'{date_field}__gte': job.since})
+        if job.until:
+            queryset = queryset.filter(**{f'{date_field}__lt': job.until})
+        if job.action == ModerationJob.HIDE:
+            queryset = queryset.filter(is_hidden=False)
+        yield model, queryset
+
+
+def moderate_chunk(action, model, ids):
+    """Скрывает или удаляет одну пачку и возвращает имена картинок,
+    которые нужно убрать с диска после коммита."""
+    images = []
+    with transaction.atomic():
+        rows = model.all_objects.filter(id__in=ids)
+        if action == ModerationJob.HIDE:
+            rows.update(is_hidden=True)
+        elif model in (Post, ArchivedPost):
+            images = list(
+                rows.exclude(image='').exclude(image=None)
+                .values_list('image', flat=True)
+            )
+            ActivityBucket.objects.filter(
+                kind=ActivityBucket.POST, object_id__in=ids
+            ).delete()
+            # Комментарии, теги и упоминания удаляются одним DELETE на
+            # таблицу, сами посты загружаются только с id.
+            rows.only('id').delete()
+        else:
+            rows.delete()
+    return images
+
+
+def chunk_fields(model):
+    """Поля строки пачки для сброса кэшей: id, пост, автор поста и его
+    группа. Комментарий меняет страницу поста, профиль и группу автора
+    поста, а не комментатора."""
+    if model in (Post, ArchivedPost):
+        return 'id', 'id', 'author_id', 'group_id'
+    return 'id', 'post_id', 'post__author_id', 'post__group_id'
+
+
+def forget_caches(post_ids, author_ids, group_ids, archived=False):
+    cache.delete_many([card_key(archived, post_id) for post_id in post_ids])
+    for author_id in author_ids:
+        forget_follower_feeds(author_id)
+    forget_pages(
+        *[('post', post_id) for post_id in post_ids],
+        *[('user', author_id) for author_id in author_ids],
+        *[('group', group_id) for group_id in group_ids if group_id]
+    )
+
+
+def run_job(job, chunk_size=500, pause=0):
+    """Выполняет задание и после каждой пачки отдаёт число обработанных
+    строк; прогресс сохраняется в задании."""
+    try:
+        targets = list(job_targets(job))
+        job.status = ModerationJob.RUNNING
+        job.total = sum(queryset.count() for _, queryset in targets)
+        job.save(update_fields=['status', 'total'])
+        for model, queryset in targets:
+            fields = chunk_fields(model)
+            archived = model in (ArchivedPost, ArchivedComment)
+            last_id = 0
+            while True:
+                rows = list(
+                    queryset.filter(id__gt=last_id).order_by('id')
+                    .values_list(*fields)[:chunk_size]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                ids, post_ids, author_ids, group_ids = zip(*rows)
+                images = moderate_chunk(job.action, model, ids)
+                forget_caches(
+                    set(post_ids), set(author_ids), set(group_ids), archived
+                )
+                delete_images(images)
+                job.processed += len(rows)
+                job.save(update_fields=['processed'])
+                yield job.processed
+                if pause:
+                    time.sleep(pause)
+    except Exception as error:
+        job.status = ModerationJob.FAILED
+        job.error = repr(error)
+        job.finished = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished'])
+        raise
+    update_trending()
+    job.status = ModerationJob.DONE
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'finished'])
+
+
+def next_job():
+    """Забирает самое старое задание из очереди; условный UPDATE не даёт
+    двум воркерам взять одно и то же задание."""
+    for job in ModerationJob.objects.filter(
+        status=ModerationJob.QUEUED
+    ).order_by('created'):
+        taken = ModerationJob.objects.filter(
+            pk=job.pk, status=ModerationJob.QUEUED
+        ).update(status=ModerationJob.RUNNING)
+        if taken:
+            job.status = ModerationJob.RUNNING
+            return job
+    return None
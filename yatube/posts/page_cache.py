@@ -0,0 +1,89 @@
+"""Общий кэш целых страниц для анонимов и вошедших пользователей.
+
+Страница рендерится так, будто её смотрит аноним (персональные куски
+— дырки из holes.py), и кладётся в кэш по адресу вместе с версиями её
+«областей»: автора, поста, группы. Изменение в области увеличивает её
+версию, и все страницы, которые от неё зависят, перестают находиться
+в кэше без перебора ключей.
+
+Клиент, закреплённый за основной базой после записи (routers.py), кэш
+обходит: ему нужна страница с его собственной записью. А промах
+рендерится из основной базы, а не с реплики, иначе в кэш на всех
+попала бы отстающая копия."""
+import time
+from functools import wraps
+from hashlib import md5
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from yatube.routers import is_pinned, primary_reads
+
+PAGE_TIMEOUT = 60
+
+
+def scope_key(kind, name):
+    return f'page:scope:{kind}:{name}'
+
+
+def scope_versions(scopes):
+    keys = [scope_key(*scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Не с нуля: после вытеснения версия не должна совпасть с той,
+            # под которой в кэше ещё лежат старые страницы.
+            versions[key] = cache.get_or_set(
+                key, lambda: int(time.time() * 1000), None
+            )
+    return [versions[key] for key in keys]
+
+
+def forget_pages(*scopes):
+    for scope in scopes:
+        try:
+            cache.incr(scope_key(*scope))
+        except ValueError:
+            # Версии нет — значит, и страниц под ней в кэше нет.
+            pass
+
+
+def restore_response(cached):
+    """Ответ из кэша с кодом и заголовками view (X-Next-Cursor у
+    фрагментов ленты, Content-Type и прочими), а не только с телом."""
+    status, headers, content = cached
+    response = HttpResponse(content, status=status)
+    for name, value in headers:
+        response[name] = value
+    return response
+
+
+def shared_page(timeout=PAGE_TIMEOUT, scopes=None):
+    """Кэширует GET-ответы view для всех зрителей сразу. scopes получает
+    аргументы view и возвращает области, от которых зависит страница."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or is_pinned():
+                return view(request, *args, **kwargs)
+            versions = scope_versions(scopes(**kwargs)) if scopes else []
+            key = 'page:{}:{}'.format(
+                md5(request.get_full_path().encode()).hexdigest(),
+                '.'.join(map(str, versions))
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                return restore_response(cached)
+            request.shared_page = True
+            with primary_reads():
+                response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(
+                    key,
+                    (response.status_code, list(response.items()),
+                     response.content),
+                    timeout
+                )
+            return response
+        return wrapper
+    return decorator
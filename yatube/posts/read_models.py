@@ -0,0 +1,106 @@
+"""Лёгкие строки для лент.
+
+post_item.html нужны только имя автора, текст, дата, картинка, группа и
+число комментариев, поэтому ленты выбирают ровно эти колонки через
+values_list и собирают из них FeedPost со __slots__. Автор и группа —
+модели только с загруженными id/username и id/slug/title (без хэша
+пароля и прочих полей) и общие для всех постов страницы."""
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import ArchivedComment, ArchivedPost, Comment, Group, User
+
+FEED_FIELDS = (
+    'id', 'text', 'text_html', 'pub_date', 'image',
+    'author_id', 'author__username',
+    'group_id', 'group__slug', 'group__title',
+)
+# Model.from_db ждёт значения в порядке полей модели:
+AUTHOR_FIELDS = ('id', 'username')
+GROUP_FIELDS = ('id', 'title', 'slug')
+
+
+class FeedPost:
+    __slots__ = (
+        'id', 'text', 'text_html', 'pub_date', 'image', 'author', 'group',
+        'comment_count', 'is_archived',
+    )
+
+    def __init__(self, **kwargs):
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self):
+        return self.text[:15]
+
+    def __repr__(self):
+        return f'<FeedPost: {self.id}>'
+
+    def __eq__(self, other):
+        return (
+            getattr(other, 'is_archived', None) == self.is_archived
+            and getattr(other, 'pk', None) == self.id
+        )
+
+    def __hash__(self):
+        return hash((self.is_archived, self.id))
+
+
+def project(queryset):
+    """Выборка только нужных колонок и числа комментариев. Счётчик —
+    коррелированный подзапрос: он считается лишь для строк страницы,
+    а не группировкой по всей таблице."""
+    comment_model = (
+        ArchivedComment if queryset.model is ArchivedPost else Comment
+    )
+    comments = comment_model.objects.filter(post=OuterRef('pk')).order_by()
+    comments = comments.values('post').annotate(count=Count('*'))
+    return queryset.annotate(
+        comment_count=Coalesce(
+            Subquery(comments.values('count'), output_field=IntegerField()),
+            0
+        )
+    ).values_list(*FEED_FIELDS, 'comment_count')
+
+
+def build_rows(values, archived=False):
+    authors = {}
+    groups = {}
+    rows = []
+    for (post_id, text, text_html, pub_date, image, author_id, username,
+         group_id, slug, title, comment_count) in values:
+        author = authors.get(author_id)
+        if author is None:
+            author = authors[author_id] = User.from_db(
+                'default', AUTHOR_FIELDS, (author_id, username)
+            )
+        group = None
+        if group_id is not None:
+            group = groups.get(group_id)
+            if group is None:
+                group = groups[group_id] = Group.from_db(
+                    'default', GROUP_FIELDS, (group_id, title, slug)
+                )
+        rows.append(FeedPost(
+            id=post_id,
+            text=text,
+            text_html=text_html,
+            pub_date=pub_date,
+            image=image or None,
+            author=author,
+            group=group,
+            comment_count=comment_count,
+            is_archived=archived,
+        ))
+    return rows
+
+
+def feed_rows(queryset, start, stop):
+    return build_rows(
+        project(queryset)[start:stop],
+        archived=queryset.model is ArchivedPost
+    )
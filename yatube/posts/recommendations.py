@@ -0,0 +1,132 @@
+"""Рекомендации «на кого подписаться» по графу подписок.
+
+Граф целиком грузится в память в виде двух CSR-массивов (кто на кого
+подписан и кто на кого подписчик), а кандидаты для пачки пользователей
+считаются векторно, без циклов по рёбрам на Python."""
+from itertools import chain
+
+import numpy as np
+from django.db import transaction
+
+from .models import Follow, FollowSuggestion
+
+
+class Graph:
+    def __init__(self, edges):
+        self.ids, dense = np.unique(edges, return_inverse=True)
+        dense = dense.reshape(edges.shape)
+        users, authors = dense[:, 0], dense[:, 1]
+        self.size = len(self.ids)
+        self.out_ptr, self.out_idx = build_csr(users, authors, self.size)
+        self.in_ptr, self.in_idx = build_csr(authors, users, self.size)
+        # Ключи рёбер для быстрой проверки «уже подписан»:
+        self.edge_keys = np.sort(users * self.size + authors)
+
+
+def load_edges():
+    rows = Follow.objects.values_list('user_id', 'author_id').iterator()
+    flat = np.fromiter(chain.from_iterable(rows), dtype=np.int64)
+    return flat.reshape(-1, 2)
+
+
+def build_csr(rows, cols, size):
+    order = np.argsort(rows, kind='stable')
+    ptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=ptr[1:])
+    return ptr, cols[order]
+
+
+def expand(ptr, idx, rows, limit=None):
+    """Для каждой строки rows отдаёт её соседей из CSR: пары
+    (номер строки в rows, сосед). limit ограничивает число соседей."""
+    starts = ptr[rows]
+    lengths = ptr[rows + 1] - starts
+    if limit is not None:
+        lengths = np.minimum(lengths, limit)
+    owners = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    return owners, idx[np.repeat(starts, lengths) + offsets]
+
+
+def block_scores(graph, users, cofollow_weight, cofollow_limit):
+    """Очки кандидатов для пачки пользователей (плотные номера):
+    - друзья друзей: u -> v -> c, по единице за каждого v;
+    - совместные подписки: u -> a <- w -> c, где w — другие подписчики
+      тех же авторов, с весом cofollow_weight."""
+    owners, followed = expand(graph.out_ptr, graph.out_idx, users)
+    fof_owner, fof = expand(graph.out_ptr, graph.out_idx, followed)
+    fof_owner = owners[fof_owner]
+
+    co_owner, similar = expand(
+        graph.in_ptr, graph.in_idx, followed, cofollow_limit
+    )
+    cf_owner, cofollowed = expand(graph.out_ptr, graph.out_idx, similar)
+    cf_owner = owners[co_owner][cf_owner]
+
+    size = graph.size
+    keys = np.concatenate([
+        users[fof_owner] * size + fof,
+        users[cf_owner] * size + cofollowed,
+    ])
+    weights = np.concatenate([
+        np.ones(len(fof)),
+        np.full(len(cofollowed), cofollow_weight),
+    ])
+    keys, inverse = np.unique(keys, return_inverse=True)
+    scores = np.bincount(inverse, weights=weights)
+
+    user, candidate = np.divmod(keys, size)
+    position = np.searchsorted(graph.edge_keys, keys)
+    position = np.minimum(position, len(graph.edge_keys) - 1)
+    already = graph.edge_keys[position] == keys
+    keep = (user != candidate) & ~already
+    return user[keep], candidate[keep], scores[keep]
+
+
+def top_n(user, candidate, scores, limit):
+    order = np.lexsort((-scores, user))
+    user, candidate, scores = user[order], candidate[order], scores[order]
+    first = np.searchsorted(user, user, side='left')
+    rank = np.arange(len(user)) - first
+    keep = rank < limit
+    return user[keep], candidate[keep], scores[keep]
+
+
+def compute_suggestions(limit=10, block_size=1000, cofollow_weight=0.25,
+                        cofollow_limit=50):
+    """Пересчитывает FollowSuggestion для всех подписчиков пачками по
+    block_size пользователей и отдаёт число обработанных за пачку."""
+    edges = load_edges()
+    if not len(edges):
+        FollowSuggestion.objects.all().delete()
+        return
+    graph = Graph(edges)
+    followers = np.flatnonzero(np.diff(graph.out_ptr))
+    for start in range(0, len(followers), block_size):
+        users = followers[start:start + block_size]
+        user, candidate, scores = top_n(
+            *block_scores(graph, users, cofollow_weight, cofollow_limit),
+            limit
+        )
+        # Подменяем рекомендации пачки в одной транзакции, чтобы
+        # страницы не увидели пустой список посреди пересчёта.
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(
+                user_id__in=graph.ids[users].tolist()
+            ).delete()
+            FollowSuggestion.objects.bulk_create(
+                (
+                    FollowSuggestion(
+                        user_id=int(graph.ids[u]),
+                        suggested_id=int(graph.ids[c]),
+                        score=float(s),
+                    )
+                    for u, c, s in zip(user, candidate, scores)
+                ),
+                batch_size=500
+            )
+        yield len(users)
+    # У тех, кто отписался от всех, рекомендации больше не пересчитываются:
+    FollowSuggestion.objects.filter(user__follower__isnull=True).delete()
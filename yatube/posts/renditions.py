@@ -0,0 +1,87 @@
+"""Адаптивные картинки постов.
+
+Для каждой картинки заранее готовятся миниатюры нескольких ширин в WebP
+и в JPEG для браузеров без WebP; post_item.html выводит их в <picture>
+со srcset, и браузер сам берёт самую маленькую подходящую. Готовые
+адреса и размеры лежат в кэше одной записью на картинку, поэтому рендер
+ленты не ходит ни в хранилище, ни в key-value store sorl-thumbnail.
+Имя картинки — хэш содержимого (storage.py), так что запись общая для
+всех постов с этой картинкой. Живёт она RENDITION_TIMEOUT: удалённую
+картинку могут загрузить снова под тем же именем, а forget_renditions
+из delete_images не обязательно дошёл до кэша каждого процесса."""
+from django.core.cache import cache
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from .storage import post_images
+
+RENDITION_WIDTHS = (320, 640, 960)
+# Пропорции прежней единственной миниатюры 960x339:
+RENDITION_RATIO = 339 / 960
+# Последний формат — запасной для <img>, остальные идут в <source>.
+RENDITION_FORMATS = (('WEBP', 'image/webp'), ('JPEG', 'image/jpeg'))
+RENDITION_SIZES = '(max-width: 960px) 100vw, 960px'
+RENDITION_TIMEOUT = 60 * 60 * 24
+# Битую или пропавшую картинку не пытаемся нарезать на каждом рендере:
+FAILED_TIMEOUT = 60 * 5
+
+
+def rendition_key(name):
+    return f'renditions:{name}'
+
+
+def build_renditions(name):
+    source = ImageFile(name, post_images)
+    width = RENDITION_WIDTHS[-1]
+    sources = []
+    for format_, mime in RENDITION_FORMATS:
+        srcset = []
+        for size in RENDITION_WIDTHS:
+            thumbnail = get_thumbnail(
+                source, f'{size}x{round(size * RENDITION_RATIO)}',
+                crop='center', upscale=True, format=format_
+            )
+            srcset.append((thumbnail.url, size))
+        sources.append({
+            'type': mime,
+            'srcset': ', '.join(f'{url} {size}w' for url, size in srcset),
+            'src': srcset[-1][0],
+        })
+    fallback = sources.pop()
+    return {
+        'sources': sources,
+        'src': fallback['src'],
+        'srcset': fallback['srcset'],
+        'sizes': RENDITION_SIZES,
+        'width': width,
+        'height': round(width * RENDITION_RATIO),
+    }
+
+
+def get_renditions(image):
+    """Описание миниатюр картинки для <picture> или None, если картинки
+    нет или её не удалось прочитать. Принимает FieldFile или имя файла:
+    в лентах картинка приходит строкой из read_models."""
+    name = getattr(image, 'name', image)
+    if not name:
+        return None
+    key = rendition_key(name)
+    renditions = cache.get(key)
+    if renditions is not None:
+        return renditions or None
+    try:
+        renditions = build_renditions(name)
+    except Exception:
+        # Как тег {% thumbnail %}: без THUMBNAIL_DEBUG страница
+        # показывается без картинки, а не падает.
+        if thumbnail_settings.THUMBNAIL_DEBUG:
+            raise
+        cache.set(key, {}, FAILED_TIMEOUT)
+        return None
+    cache.set(key, renditions, RENDITION_TIMEOUT)
+    return renditions
+
+
+def forget_renditions(name):
+    cache.delete(rendition_key(name))
@@ -0,0 +1,120 @@
+"""Кэш разрешения URL: username -> пользователь и slug -> группа.
+
+Почти каждый адрес сайта начинается с username или slug, поэтому их
+поиск не должен стоить запроса к базе. Несуществующие имена тоже
+кэшируются (ненадолго), чтобы поток 404 не бил в базу. Промах читается
+из основной базы: с отстающей реплики только что зарегистрированный
+пользователь попал бы в кэш как несуществующий."""
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.http import Http404
+from django.urls import get_resolver
+
+from yatube.routers import primary_reads
+
+from .models import Group, User
+
+RESOLVE_TIMEOUT = 60 * 60
+MISSING_TIMEOUT = 60
+MISSING = 'missing'
+
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+
+@lru_cache(maxsize=None)
+def reserved_usernames():
+    """Первые сегменты адресов сайта вроде new, follow или mentions.
+    Профиль пользователя с таким именем перехватил бы другой маршрут,
+    поэтому при регистрации эти имена заняты."""
+    names = set()
+    patterns = list(get_resolver().url_patterns)
+    while patterns:
+        pattern = patterns.pop()
+        route = str(pattern.pattern)
+        if not route:
+            # include('posts.urls') с пустым префиксом:
+            patterns.extend(getattr(pattern, 'url_patterns', ()))
+            continue
+        segment = route.split('/')[0]
+        if segment and not set(segment) & set('<^\\('):
+            names.add(segment)
+    return frozenset(names)
+
+
+def username_key(username):
+    return f'resolve:user:{username}'
+
+
+def slug_key(slug):
+    return f'resolve:group:{slug}'
+
+
+def resolve_user(username):
+    """Пользователь с загруженными только полями для отображения
+    (остальные подгрузятся при обращении) или None."""
+    values = cache.get(username_key(username))
+    if values is None:
+        with primary_reads():
+            values = User.objects.filter(
+                username=username, is_active=True
+            ).values_list(
+                *USER_FIELDS
+            ).first() or MISSING
+        cache.set(
+            username_key(username), values,
+            MISSING_TIMEOUT if values == MISSING else RESOLVE_TIMEOUT
+        )
+        if values != MISSING:
+            cache.set(f'resolve:user-id:{values[0]}', username, None)
+    if values == MISSING:
+        return None
+    return User.from_db('default', USER_FIELDS, values)
+
+
+def resolve_group(slug):
+    group = cache.get(slug_key(slug))
+    if group is None:
+        with primary_reads():
+            group = Group.objects.filter(slug=slug).first() or MISSING
+        cache.set(
+            slug_key(slug), group,
+            MISSING_TIMEOUT if group == MISSING else RESOLVE_TIMEOUT
+        )
+        if group != MISSING:
+            cache.set(f'resolve:group-id:{group.pk}', slug, None)
+    if group == MISSING:
+        return None
+    return group
+
+
+def get_user_or_404(username):
+    user = resolve_user(username)
+    if user is None:
+        raise Http404('Пользователь не найден')
+    return user
+
+
+def get_group_or_404(slug):
+    group = resolve_group(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
+
+
+def forget_user(user):
+    """Сбрасывает и текущее, и прежнее имя: при переименовании старый
+    адрес должен перестать открывать профиль."""
+    old = cache.get(f'resolve:user-id:{user.pk}')
+    keys = [username_key(user.username), f'resolve:user-id:{user.pk}']
+    if old:
+        keys.append(username_key(old))
+    cache.delete_many(keys)
+
+
+def forget_group(group):
+    old = cache.get(f'resolve:group-id:{group.pk}')
+    keys = [slug_key(group.slug), f'resolve:group-id:{group.pk}']
+    if old:
+        keys.append(slug_key(old))
+    cache.delete_many(keys)
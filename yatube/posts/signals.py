@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import typeahead
+from .group_index import forget_groups
+from .models import Group, User
+from .page_cache import forget_pages
+from .resolvers import forget_group, forget_user
+
+
+@receiver((post_save, post_delete), sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance)
+    forget_pages(('user', instance.pk))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Вход на сайт сохраняет last_login — подсказкам это не важно.
+    if update_fields != frozenset({'last_login'}):
+        typeahead.user_changed(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    typeahead.user_removed(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Group)
+def group_changed(sender, instance, **kwargs):
+    forget_group(instance)
+    forget_groups()
+    forget_pages(('group', instance.pk))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    typeahead.group_changed(instance)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    typeahead.group_removed(instance.pk)
@@ -0,0 +1,99 @@
+"""Хранилище картинок постов с адресацией по содержимому.
+
+Имя файла — SHA-256 его содержимого, поэтому одна и та же картинка,
+загруженная много раз, лежит на диске в одном экземпляре, а миниатюры
+sorl-thumbnail (их имена выводятся из имени исходника) тоже общие.
+Хэш считается по ходу записи загрузки во временный файл, второго
+прохода по содержимому нет. Удалять такой файл можно, только когда на
+него не ссылается ни один пост, — см. moderation.delete_images.
+
+Между тем, как _save отдал имя уже лежащего файла, и коммитом поста с
+этим именем ссылок на файл в базе ещё не видно. Поэтому _save до
+проверки ставит рядом с файлом метку <имя>.reused (и убирает её, если
+файл оказался новым), а release убирает файл в сторону, смотрит на
+метку и, если она моложе REUSE_GRACE секунд, возвращает файл на место.
+Содержимое по имени всегда одно и то же, так что в любом порядке этих
+шагов файл остаётся у того, кто его взял."""
+import hashlib
+import os
+import posixpath
+import tempfile
+import time
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+REUSE_GRACE = 60 * 10
+
+
+def reuse_marker(path):
+    return f'{path}.reused'
+
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # Настоящее имя появится в _save, когда станет известен хэш;
+        # одинаковое имя означает одинаковое содержимое.
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        os.makedirs(self.path(directory), exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(
+            dir=self.path(directory), delete=False
+        ) as temp:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                temp.write(chunk)
+        digest = digest.hexdigest()
+        name = posixpath.join(directory, digest[:2], digest[2:] + extension)
+        path = self.path(name)
+        marker = reuse_marker(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(marker, 'a'):
+            os.utime(marker)
+        if os.path.exists(path):
+            os.remove(temp.name)
+            return name
+        os.replace(temp.name, path)
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        # Файл новый, защищать нечего; метка нужна только повторам.
+        remove_quietly(marker)
+        return name
+
+    def recently_used(self, name):
+        try:
+            reused = os.path.getmtime(reuse_marker(self.path(name)))
+        except OSError:
+            return False
+        return time.time() - reused < REUSE_GRACE
+
+    def release(self, name):
+        """Удаляет файл, если его никто не взял за последние
+        REUSE_GRACE секунд, и сообщает, удалён ли он."""
+        path = self.path(name)
+        aside = f'{path}.released'
+        try:
+            os.replace(path, aside)
+        except FileNotFoundError:
+            return False
+        if self.recently_used(name):
+            os.replace(aside, path)
+            return False
+        os.remove(aside)
+        remove_quietly(reuse_marker(path))
+        return True
+
+
+post_images = ContentAddressedStorage()
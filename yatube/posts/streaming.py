@@ -0,0 +1,45 @@
+"""Потоковая отдача лент.
+
+Страница рендерится обычным render_to_string через все extends и block,
+только вместо цикла по карточкам шаблон выводит метку STREAM_MARKER.
+Всё, что до метки (head, навигация, боковые карточки), уходит клиенту
+первым куском, затем карточки постов рендерятся и отправляются по
+одной, а в конце — остаток страницы с паджинатором и подвалом."""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.context import make_context
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+STREAM_MARKER = '<!-- post-cards -->'
+CARD_TEMPLATE = 'include/posts/post_item.html'
+
+
+def render_feed(request, template_name, context):
+    if not settings.STREAM_FEEDS:
+        return render(request, template_name, context)
+    shell = render_to_string(
+        template_name,
+        {**context, 'stream_marker': mark_safe(STREAM_MARKER)},
+        request
+    )
+    head, tail = shell.split(STREAM_MARKER, 1)
+    response = StreamingHttpResponse(
+        stream_cards(request, head, tail, context)
+    )
+    # Иначе nginx соберёт ответ целиком и поток потеряет смысл:
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def stream_cards(request, head, tail, context):
+    yield head
+    card = get_template(CARD_TEMPLATE).template
+    card_context = make_context(context, request)
+    # Контекстные процессоры отрабатывают один раз на всю ленту:
+    with card_context.bind_template(card):
+        for post in context['page']:
+            with card_context.push(post=post):
+                yield card.render(card_context)
+    yield tail
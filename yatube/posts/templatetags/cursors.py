@@ -0,0 +1,11 @@
+from django import template
+
+from ..feeds import feed_cursor as make_cursor
+
+register = template.Library()
+
+
+@register.filter
+def feed_cursor(page):
+    """Курсор бесконечной ленты после последнего поста страницы."""
+    return make_cursor(page.object_list[-1])
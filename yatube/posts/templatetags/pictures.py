@@ -0,0 +1,10 @@
+from django import template
+
+from ..renditions import get_renditions
+
+register = template.Library()
+
+
+@register.inclusion_tag('include/posts/picture.html')
+def picture(image, css_class=''):
+    return {'image': get_renditions(image), 'css_class': css_class}
@@ -0,0 +1,128 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..account_deletion import next_deletion, request_deletion, run_deletion
+from ..feed_cache import CachedFollowFeed
+from ..feeds import index_feed
+from ..follow_cache import is_following
+from ..models import (AccountDeletion, ArchivedPost, Comment, Follow, Mention,
+                      Post, User)
+from .test_moderation import GIF
+from .utils import shared_cache
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class AccountDeletionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.leaving = User.objects.create_user(username='Leaving')
+        cls.friend = User.objects.create_user(username='Friend')
+        Follow.objects.create(user=cls.friend, author=cls.leaving)
+        Follow.objects.create(user=cls.leaving, author=cls.friend)
+        cls.friend_post = Post.objects.create(
+            author=cls.friend, text='Привет, @Leaving'
+        )
+        Mention.objects.create(
+            user=cls.leaving, post=cls.friend_post,
+            pub_date=cls.friend_post.pub_date
+        )
+        for i in range(3):
+            post = Post.objects.create(author=cls.leaving, text=f'Пост {i}')
+            Comment.objects.create(post=post, author=cls.friend, text='Ок')
+            Comment.objects.create(
+                post=cls.friend_post, author=cls.leaving, text=f'Ответ {i}'
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_user_disappears_immediately(self):
+        self.assertEqual(CachedFollowFeed(self.friend).count(), 3)
+        self.assertTrue(is_following(self.friend, self.leaving.id))
+        request_deletion(self.leaving)
+        self.assertEqual(
+            [post.id for post in index_feed()[0:10]], [self.friend_post.id]
+        )
+        self.assertEqual(CachedFollowFeed(self.friend).count(), 0)
+        self.assertEqual(self.friend_post.comments.count(), 0)
+        response = self.client.get(reverse('profile', args=['Leaving']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_resumes_from_checkpoint_and_removes_everything(self):
+        post = Post.objects.filter(author=self.leaving).first()
+        post.image = SimpleUploadedFile('leaving.gif', GIF, 'image/gif')
+        post.save()
+        image = post.image.name
+        ArchivedPost.objects.create(
+            id=10_000, author=self.leaving, text='Старый',
+            pub_date=post.pub_date
+        )
+
+        deletion = request_deletion(self.leaving)
+        steps = run_deletion(deletion, chunk_size=2)
+        next(steps)
+        next(steps)
+        steps.close()
+        deletion = AccountDeletion.objects.get()
+        self.assertEqual(deletion.stage, 'comments')
+        self.assertEqual(deletion.deleted, 3)
+        self.assertEqual(Comment.all_objects.filter(
+            author=self.leaving
+        ).count(), 0)
+
+        # Аренда упавшего воркера истекла:
+        AccountDeletion.objects.update(
+            leased_until=timezone.now() - timedelta(seconds=1)
+        )
+        with shared_cache():
+            call_command('delete_accounts', pause=0, stdout=StringIO())
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.status, AccountDeletion.DONE)
+        self.assertFalse(User.objects.filter(username='Leaving').exists())
+        self.assertFalse(Post.all_objects.filter(author_id=deletion.user_id))
+        self.assertFalse(
+            ArchivedPost.all_objects.filter(author_id=deletion.user_id)
+        )
+        self.assertFalse(Follow.objects.filter(user=self.friend))
+        self.assertFalse(Mention.objects.exists())
+        self.assertFalse(default_storage.exists(image))
+        self.assertFalse(is_following(self.friend, deletion.user_id))
+        self.assertEqual(
+            list(Post.objects.all()), [self.friend_post]
+        )
+
+    def test_two_workers_do_not_take_the_same_deletion(self):
+        request_deletion(self.leaving)
+        deletion = next_deletion()
+        self.assertIsNotNone(deletion)
+        self.assertIsNone(next_deletion())
+
+        # Воркер упал: когда аренда истекла, удаление берёт другой.
+        AccountDeletion.objects.update(
+            leased_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(next_deletion(), deletion)
+
+    def test_worker_refuses_process_local_cache(self):
+        request_deletion(self.leaving)
+        with self.assertRaises(CommandError):
+            call_command('delete_accounts', pause=0, stdout=StringIO())
+        self.assertTrue(User.objects.filter(username='Leaving').exists())
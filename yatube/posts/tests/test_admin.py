@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..admin import GroupAdmin, PostAdmin
+from ..models import Comment, Follow, Group, Post, User
+
+
+@mock.patch.object(PostAdmin, 'list_per_page', 3)
+class ScalableAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@ya.ru', 'secret-42'
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.admin, text=f'Пост {i}')
+            for i in range(7)
+        ]
+
+    def setUp(self):
+        self.client.force_login(ScalableAdminTest.admin)
+
+    def test_changelist_pages_by_id_without_count(self):
+        url = reverse('admin:posts_post_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries.captured_queries)
+        )
+        shown = [post.pk for post in response.context['cl'].result_list]
+        self.assertEqual(shown, [post.pk for post in self.posts[:-4:-1]])
+        next_url = response.context['cl'].next_url
+        self.assertEqual(next_url, f'?id__lt={shown[-1]}')
+
+        response = self.client.get(url + next_url)
+        shown = [post.pk for post in response.context['cl'].result_list]
+        self.assertEqual(shown, [post.pk for post in self.posts[3:0:-1]])
+        self.assertEqual(response.context['cl'].first_url, '?')
+
+        response = self.client.get(url + f'?id__lt={shown[-1]}')
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+        self.assertIsNone(response.context['cl'].next_url)
+
+    def test_changelist_renders_keyset_links(self):
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        next_url = response.context['cl'].next_url
+        self.assertContains(response, f'href="{next_url}"')
+
+    def test_other_changelists_keep_page_numbers(self):
+        Group.objects.bulk_create(
+            Group(title=f'Группа {i}', slug=f'group-{i}') for i in range(4)
+        )
+        with mock.patch.object(GroupAdmin, 'list_per_page', 3):
+            response = self.client.get(reverse('admin:posts_group_changelist'))
+        self.assertContains(response, '4 groups')
+        self.assertContains(response, 'href="?p=1"')
+
+    def test_changelists_join_related_rows(self):
+        post = self.posts[0]
+        Comment.objects.create(post=post, author=self.admin, text='Раз')
+        Comment.objects.create(post=post, author=self.admin, text='Два')
+        Follow.objects.create(
+            user=User.objects.create(username='Fan'), author=self.admin
+        )
+        for name in ('post', 'comment', 'follow'):
+            with self.subTest(name=name):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(
+                        reverse(f'admin:posts_{name}_changelist')
+                    )
+                # Сессия, пользователь, проверка «есть ли дальше», строки
+                # страницы и годы для date_hierarchy — без запроса на строку.
+                self.assertLessEqual(len(queries), 6)
+
+    def test_change_form_uses_autocomplete(self):
+        User.objects.create(username='Stranger')
+        response = self.client.get(
+            reverse('admin:posts_post_change', args=[self.posts[0].pk])
+        )
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, 'Stranger')
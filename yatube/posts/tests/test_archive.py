@@ -0,0 +1,117 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from yatube.settings import ITEMS_PER_PAGE
+
+from ..archive import (ARCHIVE_VERSION_KEY, archive_posts, archive_version,
+                       bump_archive_version)
+from ..models import ArchivedComment, ArchivedPost, Comment, Post, User
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='ArchiveTester')
+        cls.guest_client = Client()
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Archive post {i}')
+            for i in range(ITEMS_PER_PAGE + 2)
+        ]
+        # Первые три поста делаем старыми:
+        for days, post in enumerate(cls.posts[:3], start=400):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=days)
+            )
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.user, text='Old comment'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.before = timezone.now() - timedelta(days=365)
+
+    def test_old_posts_and_comments_move_to_archive(self):
+        """Старые посты и их комментарии уезжают в архив пачками"""
+        batches = list(archive_posts(self.before, batch_size=2))
+        self.assertEqual(batches, [2, 1])
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+        self.assertEqual(ArchivedComment.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), ITEMS_PER_PAGE - 1)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            ArchivedPost.objects.get(pk=self.posts[0].pk).text,
+            self.posts[0].text
+        )
+
+    def test_hidden_stays_hidden_in_archive(self):
+        """Скрытое модерацией архивируется скрытым, а не удаляется"""
+        Comment.objects.create(
+            post=self.posts[1], author=self.user, text='Скрытый',
+            is_hidden=True
+        )
+        Post.objects.filter(pk=self.posts[2].pk).update(is_hidden=True)
+        list(archive_posts(self.before, batch_size=10))
+        self.assertEqual(ArchivedPost.all_objects.count(), 3)
+        self.assertEqual(ArchivedPost.objects.count(), 2)
+        self.assertEqual(ArchivedComment.all_objects.count(), 2)
+        self.assertEqual(
+            list(ArchivedComment.objects.values_list('text', flat=True)),
+            ['Old comment']
+        )
+
+    def test_evicted_version_does_not_restart(self):
+        """После вытеснения версия архива не возвращается к старой"""
+        with mock.patch('posts.archive.time.time', return_value=1000):
+            first = archive_version()
+            bump_archive_version()
+        cache.delete(ARCHIVE_VERSION_KEY)
+        with mock.patch('posts.archive.time.time', return_value=1001):
+            bump_archive_version()
+            self.assertGreater(archive_version(), first + 1)
+
+    def test_command_refuses_process_local_cache(self):
+        """Без общего кэша сайт не узнал бы о новой версии архива"""
+        with self.assertRaises(CommandError):
+            call_command('archive_posts', stdout=StringIO())
+        self.assertFalse(ArchivedPost.objects.exists())
+
+    def test_feed_continues_into_archive(self):
+        """Пагинатор ленты продолжает выдачу архивными постами"""
+        list(archive_posts(self.before, batch_size=10))
+        response = self.guest_client.get(reverse('index') + '?page=2')
+        page = response.context['page']
+        self.assertEqual(response.context['posts_total'], len(self.posts))
+        self.assertEqual(len(page.object_list), 2)
+        self.assertTrue(all(post.is_archived for post in page.object_list))
+
+    def test_fragment_reaches_archive_without_counting(self):
+        """Фрагмент ленты добирает архив, не считая свежие посты"""
+        list(archive_posts(self.before, batch_size=10))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(reverse('index_more'))
+        posts = response.context['posts']
+        self.assertEqual(len(posts), ITEMS_PER_PAGE)
+        self.assertTrue(posts[-1].is_archived)
+        self.assertFalse(
+            [query for query in queries if '__count' in query['sql']]
+        )
+
+    def test_archived_post_page_is_available(self):
+        """Страница архивного поста открывается по старому адресу"""
+        list(archive_posts(self.before, batch_size=10))
+        post = self.posts[0]
+        response = self.guest_client.get(
+            reverse('post', args=(self.user.username, post.pk))
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Old comment')
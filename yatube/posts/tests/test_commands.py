@@ -0,0 +1,30 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class GenerateDataTest(TestCase):
+    def test_generate_data_creates_requested_volumes(self):
+        """Команда generate_data создаёт заданное количество объектов"""
+        call_command(
+            'generate_data', users=20, groups=3, posts=50, comments=40,
+            follows=30, batch_size=7, chunk_size=16, stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertLessEqual(Follow.objects.count(), 30)
+        self.assertGreater(Follow.objects.count(), 0)
+
+    def test_generate_data_spreads_publication_dates(self):
+        """Даты публикаций не совпадают с моментом генерации"""
+        call_command(
+            'generate_data', users=5, groups=1, posts=20, comments=0,
+            follows=0, stdout=StringIO()
+        )
+        dates = set(Post.objects.values_list('pub_date', flat=True))
+        self.assertGreater(len(dates), 1)
@@ -0,0 +1,61 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.utils.datastructures import MultiValueDict
+
+from yatube.sqlite_wal.retry import retry_on_locked
+
+
+@override_settings(DB_WRITE_RETRY_ATTEMPTS=3, DB_WRITE_RETRY_DELAY=0.001)
+class RetryOnLockedTest(TransactionTestCase):
+    def test_locked_write_is_retried(self):
+        """Запись повторяется, пока база занята"""
+        calls = []
+
+        @retry_on_locked
+        def write():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(write(), 'ok')
+        self.assertEqual(len(calls), 3)
+
+    def test_retry_rewinds_uploads(self):
+        """Повтор видит загруженный файл целиком, а не с конца"""
+        request = RequestFactory().post('/')
+        request._files = MultiValueDict(
+            {'image': [SimpleUploadedFile('a.gif', b'GIF89a')]}
+        )
+        reads = []
+
+        @retry_on_locked
+        def write(request):
+            reads.append(request.FILES['image'].read())
+            if len(reads) < 2:
+                raise OperationalError('database is locked')
+
+        write(request)
+        self.assertEqual(reads, [b'GIF89a', b'GIF89a'])
+
+    def test_other_errors_are_not_retried(self):
+        """Прочие ошибки базы пробрасываются без повторов"""
+        calls = []
+
+        @retry_on_locked
+        def write():
+            calls.append(1)
+            raise OperationalError('no such table: posts_post')
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+    def test_connection_uses_configured_pragmas(self):
+        """Новое соединение получает прагмы из обёртки над SQLite"""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from yatube.routers import ReplicaPinningMiddleware, replica_reads
+from yatube.settings import ITEMS_PER_PAGE
+
+from ..feed_cache import CachedFollowFeed, forget_follower_feeds
+from ..models import Follow, Post, User
+from .utils import capture_on_commit_callbacks
+
+
+class CachedFollowFeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.author = User.objects.create_user(username='Author')
+        cls.other = User.objects.create_user(username='Other')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(ITEMS_PER_PAGE + 2):
+            Post.objects.create(author=cls.author, text=f'Пост {i}')
+        Post.objects.create(author=cls.other, text='Чужой пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(CachedFollowFeedTest.reader)
+
+    def page_texts(self):
+        feed = CachedFollowFeed(CachedFollowFeedTest.reader)
+        return [post.text for post in feed[0:ITEMS_PER_PAGE]]
+
+    def test_warm_feed_needs_no_queries(self):
+        first = self.page_texts()
+        with self.assertNumQueries(0):
+            feed = CachedFollowFeed(CachedFollowFeedTest.reader)
+            self.assertEqual(feed.count(), ITEMS_PER_PAGE + 2)
+            self.assertEqual(
+                [post.text for post in feed[0:ITEMS_PER_PAGE]], first
+            )
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_miss_is_filled_from_primary(self):
+        """Промах читается из основной базы: реплики replica1 нет, и
+        запрос к ней упал бы"""
+        @replica_reads
+        def view(request):
+            feed = CachedFollowFeed(CachedFollowFeedTest.reader)
+            return [post.text for post in feed[0:ITEMS_PER_PAGE]]
+
+        request = RequestFactory().get(reverse('follow_index'))
+        texts = ReplicaPinningMiddleware(view)(request)
+        self.assertEqual(len(texts), ITEMS_PER_PAGE)
+
+    def test_new_post_by_followed_author_resets_feed(self):
+        self.page_texts()
+        author_client = Client()
+        author_client.force_login(CachedFollowFeedTest.author)
+        with capture_on_commit_callbacks() as callbacks:
+            author_client.post(reverse('new_post'), {'text': 'Свежий пост'})
+        # До коммита лента не сбрасывается и не впускает в кэш то, что
+        # ещё могут откатить:
+        self.assertNotEqual(self.page_texts()[0], 'Свежий пост')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.page_texts()[0], 'Свежий пост')
+
+    def test_reset_does_not_visit_followers(self):
+        for i in range(20):
+            Follow.objects.create(
+                user=User.objects.create(username=f'Fan{i}'),
+                author=CachedFollowFeedTest.author
+            )
+        self.page_texts()
+        Post.objects.create(author=CachedFollowFeedTest.author, text='Новый')
+        with self.assertNumQueries(0):
+            forget_follower_feeds(CachedFollowFeedTest.author.id)
+        self.assertEqual(self.page_texts()[0], 'Новый')
+
+    def test_comment_resets_card(self):
+        self.page_texts()
+        post = Post.objects.filter(author=CachedFollowFeedTest.author).first()
+        with capture_on_commit_callbacks(execute=True):
+            self.client.post(
+                reverse('add_comment', args=['Author', post.id]),
+                {'text': 'Комментарий'}
+            )
+        feed = CachedFollowFeed(CachedFollowFeedTest.reader)
+        self.assertEqual(feed[0:1][0].comment_count, 1)
+
+    def test_follow_and_unfollow_reset_feed(self):
+        self.page_texts()
+        with capture_on_commit_callbacks(execute=True):
+            self.client.get(reverse('profile_follow', args=['Other']))
+        self.assertEqual(self.page_texts()[0], 'Чужой пост')
+        with capture_on_commit_callbacks(execute=True):
+            self.client.get(reverse('profile_unfollow', args=['Other']))
+        self.assertNotIn('Чужой пост', self.page_texts())
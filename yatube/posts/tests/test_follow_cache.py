@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..follow_cache import followed_among, following_ids, is_following
+from ..holes import follow_suggestions
+from ..models import Follow, FollowSuggestion, User
+from .utils import capture_on_commit_callbacks
+
+
+class FollowCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='CacheFollower')
+        cls.authors = [
+            User.objects.create_user(username=f'CacheAuthor{i}')
+            for i in range(3)
+        ]
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_follow_status_is_answered_without_queries(self):
+        """После загрузки набора проверка подписки не ходит в базу"""
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        following_ids(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(is_following(self.user, self.authors[1].id))
+            self.assertFalse(is_following(self.user, self.authors[0].id))
+            self.assertEqual(
+                followed_among(self.user, [a.id for a in self.authors]),
+                {self.authors[1].id}
+            )
+
+    def test_follow_and_unfollow_reset_cached_set(self):
+        """Подписка и отписка сбрасывают набор после коммита"""
+        author = self.authors[2]
+        following_ids(self.user.id)
+        with capture_on_commit_callbacks() as callbacks:
+            self.authorized_client.get(
+                reverse('profile_follow', args=(author.username,))
+            )
+        self.assertFalse(is_following(self.user, author.id))
+        for callback in callbacks:
+            callback()
+        self.assertTrue(is_following(self.user, author.id))
+        response = self.authorized_client.get(
+            reverse('profile', args=(author.username,))
+        )
+        self.assertTrue(response.context['follows'])
+        with capture_on_commit_callbacks(execute=True):
+            self.authorized_client.get(
+                reverse('profile_unfollow', args=(author.username,))
+            )
+        self.assertFalse(is_following(self.user, author.id))
+
+    def test_followed_authors_drop_out_of_suggestions(self):
+        """Рекомендации сверяются с набором подписок одной проверкой"""
+        for score, author in enumerate(self.authors):
+            FollowSuggestion.objects.create(
+                user=self.user, suggested=author, score=score
+            )
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        following_ids(self.user.id)
+        with self.assertNumQueries(1):
+            suggested = [s.suggested for s in follow_suggestions(self.user)]
+        self.assertEqual(suggested, [self.authors[2], self.authors[0]])
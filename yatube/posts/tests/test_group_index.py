@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..forms import PostForm
+from ..group_index import search_groups
+from ..models import Group, Post, User
+
+
+class GroupIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Picker')
+        cls.groups = {
+            title: Group.objects.create(
+                title=title, slug=f'group-{i}', description='-'
+            )
+            for i, title in enumerate(
+                ('Котики', 'кофе', 'Кошки', 'Собаки', 'Коты и люди')
+            )
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_choices_are_served_from_cache(self):
+        self.client.get(reverse('new_post'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('new_post'))
+        self.assertFalse(
+            any('posts_group' in query['sql']
+                for query in queries.captured_queries)
+        )
+        choices = [title for _, title in
+                   response.context['form'].fields['group'].choices]
+        self.assertEqual(choices[1:], sorted(self.groups, key=str.casefold))
+
+        Group.objects.create(title='Аисты', slug='storks', description='-')
+        response = self.client.get(reverse('new_post'))
+        self.assertContains(response, 'Аисты')
+        Group.objects.get(title='Собаки').delete()
+        response = self.client.get(reverse('new_post'))
+        self.assertNotContains(response, 'Собаки')
+
+    def test_search_by_prefix(self):
+        self.assertEqual(
+            [title for _, title in search_groups('ко')],
+            ['Котики', 'Коты и люди', 'кофе', 'Кошки']
+        )
+        self.assertEqual(
+            [title for _, title in search_groups('КОТ', limit=1)], ['Котики']
+        )
+        self.assertEqual(search_groups('  '), [])
+        response = self.client.get(reverse('group_search'), {'q': 'соб'})
+        self.assertEqual(response.json(), {'results': [
+            {'id': self.groups['Собаки'].id, 'title': 'Собаки'}
+        ]})
+
+    @override_settings(GROUP_SELECT_LIMIT=2)
+    def test_picker_replaces_long_select(self):
+        post = Post.objects.create(
+            author=self.user, text='Кофе', group=self.groups['кофе']
+        )
+        form = PostForm(instance=post)
+        self.assertEqual(
+            list(form.fields['group'].choices)[1:],
+            [(self.groups['кофе'].id, 'кофе')]
+        )
+        self.assertIn('data-search', str(form['group']))
+
+        form = PostForm(
+            {'text': 'Про собак', 'group': self.groups['Собаки'].id},
+            instance=post
+        )
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.save().group, self.groups['Собаки'])
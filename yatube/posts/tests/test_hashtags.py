@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..hashtags import (extract_mentions, extract_tags, index_all_posts,
+                        index_post)
+from ..models import Mention, Post, PostTag, User
+
+
+class HashtagTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TagTester')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_extract(self):
+        """Хэштеги и упоминания выделяются из текста поста"""
+        text = 'Про #Django и #python3, привет @reader. mail@example.com'
+        self.assertEqual(extract_tags(text), {'django', 'python3'})
+        self.assertEqual(extract_mentions(text), {'reader'})
+
+    def test_new_post_is_indexed(self):
+        """Новый пост сразу попадает в ленту тега и в упоминания"""
+        self.authorized_client.post(
+            reverse('new_post'), data={'text': 'Смотри #новости @reader'}
+        )
+        post = Post.objects.get()
+        response = self.reader_client.get(
+            reverse('tag_posts', args=('Новости',))
+        )
+        self.assertEqual(response.context['page'][0], post)
+        response = self.reader_client.get(reverse('mentions'))
+        self.assertEqual(response.context['page'][0], post)
+
+    def test_edit_updates_index(self):
+        """После правки поста старые теги из индекса удаляются"""
+        post = Post.objects.create(author=self.user, text='#old @reader')
+        index_post(post)
+        post.text = '#new'
+        post.save()
+        index_post(post)
+        self.assertEqual(
+            list(post.post_tags.values_list('tag__name', flat=True)), ['new']
+        )
+        self.assertFalse(Mention.objects.exists())
+
+    def test_bulk_index(self):
+        """Массовая индексация обрабатывает все посты"""
+        for i in range(5):
+            Post.objects.create(author=self.user, text=f'#bulk{i % 2} пост')
+        self.assertEqual(sum(index_all_posts(batch_size=2)), 5)
+        self.assertEqual(PostTag.objects.count(), 5)
+        self.assertEqual(
+            PostTag.objects.filter(tag__name='bulk0').count(), 3
+        )
@@ -0,0 +1,200 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db.models.signals import m2m_changed
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..feed_cache import CachedFollowFeed
+from ..feeds import index_feed
+from ..models import (ArchivedComment, ArchivedPost, Comment, Follow, Group,
+                      ModerationJob, Post, PostTag, Tag, User)
+from ..moderation import next_job, run_job
+from ..page_cache import scope_versions
+from .utils import shared_cache
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ModerationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.spammer = User.objects.create_user(username='Spammer')
+        cls.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=cls.reader, author=cls.spammer)
+        cls.good = Post.objects.create(author=cls.reader, text='Хороший')
+        cls.spam = [
+            Post.objects.create(author=cls.spammer, text=f'Спам {i}')
+            for i in range(5)
+        ]
+        Comment.objects.create(post=cls.good, author=cls.spammer, text='!')
+        Comment.objects.create(post=cls.good, author=cls.reader, text='Ок')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def run_job(self, action, **kwargs):
+        authors = kwargs.pop('authors', [])
+        job = ModerationJob.objects.create(action=action, **kwargs)
+        job.authors.set(authors)
+        progress = list(run_job(job, chunk_size=2))
+        job.refresh_from_db()
+        return job, progress
+
+    def test_hide_by_author(self):
+        CachedFollowFeed(self.reader)
+        job, progress = self.run_job(
+            ModerationJob.HIDE, authors=[self.spammer]
+        )
+        self.assertEqual(job.status, ModerationJob.DONE)
+        self.assertEqual((job.processed, job.total), (6, 6))
+        self.assertEqual(progress, [1, 3, 5, 6])
+        self.assertEqual(
+            [post.id for post in index_feed()[0:10]], [self.good.id]
+        )
+        self.assertEqual(self.good.comments.count(), 1)
+        self.assertEqual(Post.all_objects.count(), 6)
+        self.assertEqual(CachedFollowFeed(self.reader).count(), 0)
+        response = self.client.get(
+            reverse('post', args=['Spammer', self.spam[0].id])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_archived_posts_and_comments_are_hidden(self):
+        old = ArchivedPost.objects.create(
+            id=1000, author=self.spammer, text='Старый спам',
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        ArchivedComment.objects.create(
+            id=1000, post=old, author=self.spammer, text='!',
+            created=old.pub_date
+        )
+        job, _ = self.run_job(ModerationJob.HIDE, authors=[self.spammer])
+        self.assertEqual(job.processed, 8)
+        self.assertEqual(
+            [post.id for post in index_feed()[0:10]], [self.good.id]
+        )
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(ArchivedComment.objects.exists())
+        self.assertEqual(ArchivedPost.all_objects.count(), 1)
+
+    def test_delete_in_time_window(self):
+        post = self.spam[0]
+        post.image = SimpleUploadedFile('spam.gif', GIF, 'image/gif')
+        post.save()
+        PostTag.objects.create(
+            tag=Tag.objects.create(name='спам'), post=post,
+            pub_date=post.pub_date
+        )
+        Comment.objects.create(post=post, author=self.reader, text='Фу')
+        Post.all_objects.filter(id__in=[p.id for p in self.spam]).update(
+            pub_date=timezone.now() - timedelta(days=1)
+        )
+        job, _ = self.run_job(
+            ModerationJob.DELETE,
+            scope=ModerationJob.POSTS,
+            since=timezone.now() - timedelta(days=2),
+            until=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(job.processed, 5)
+        self.assertEqual(list(Post.all_objects.all()), [self.good])
+        self.assertFalse(PostTag.objects.exists())
+        self.assertFalse(Comment.all_objects.filter(post=post.id).exists())
+        self.assertFalse(default_storage.exists(post.image.name))
+
+    def test_admin_action_queues_job_for_authors(self):
+        admin = User.objects.create_superuser('admin', 'a@ya.ru', 'pass-42')
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:posts_comment_changelist'), {
+            'action': 'delete_by_authors',
+            '_selected_action': list(
+                Comment.objects.filter(author=self.spammer)
+                .values_list('id', flat=True)
+            ),
+        })
+        job = ModerationJob.objects.get()
+        self.assertEqual(job.action, ModerationJob.DELETE)
+        self.assertEqual(list(job.authors.all()), [self.spammer])
+
+        with shared_cache():
+            call_command('moderate', pause=0, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ModerationJob.DONE)
+        self.assertFalse(Post.all_objects.filter(author=self.spammer))
+        self.assertFalse(Comment.all_objects.filter(author=self.spammer))
+
+    def test_worker_refuses_process_local_cache(self):
+        ModerationJob.objects.create(action=ModerationJob.HIDE).authors.set(
+            [self.spammer]
+        )
+        with self.assertRaises(CommandError):
+            call_command('moderate', pause=0, stdout=StringIO())
+        self.assertEqual(
+            ModerationJob.objects.get().status, ModerationJob.QUEUED
+        )
+
+    def test_hidden_comment_forgets_pages_of_its_post(self):
+        group = Group.objects.create(title='Группа', slug='moderated')
+        Post.objects.filter(pk=self.good.pk).update(group=group)
+        scopes = [
+            ('post', self.good.id), ('user', self.reader.id),
+            ('group', group.id),
+        ]
+        before = scope_versions(scopes)
+        self.run_job(
+            ModerationJob.HIDE, scope=ModerationJob.COMMENTS,
+            authors=[self.spammer]
+        )
+        after = scope_versions(scopes)
+        for scope, old, new in zip(scopes, before, after):
+            with self.subTest(scope=scope):
+                self.assertNotEqual(old, new)
+
+    def test_worker_does_not_claim_job_before_authors_are_set(self):
+        claimed = []
+
+        def claim(action, **kwargs):
+            if action == 'pre_add':
+                claimed.append(next_job())
+
+        m2m_changed.connect(claim, sender=ModerationJob.authors.through)
+        self.addCleanup(
+            m2m_changed.disconnect, claim,
+            sender=ModerationJob.authors.through
+        )
+        admin = User.objects.create_superuser('admin', 'a@ya.ru', 'pass-42')
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'hide_by_authors',
+            '_selected_action': [self.spam[0].id],
+        })
+        self.assertEqual(claimed, [None])
+        self.assertEqual(next_job().authors.get(), self.spammer)
+
+    def test_job_without_filters_is_refused(self):
+        job = ModerationJob.objects.create(action=ModerationJob.DELETE)
+        with self.assertRaises(ValueError):
+            list(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ModerationJob.FAILED)
+        self.assertEqual(Post.all_objects.count(), 6)
+        self.assertEqual(Comment.all_objects.count(), 2)
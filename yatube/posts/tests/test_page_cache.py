@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from yatube.routers import PIN_COOKIE
+from yatube.settings import ITEMS_PER_PAGE
+
+from ..models import Post, User
+from .utils import capture_on_commit_callbacks
+
+
+class SharedPageTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(author=cls.author, text='Общий пост')
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_one_rendering_for_everybody(self):
+        url = reverse('profile', args=['Author'])
+        response = self.author_client.get(url)
+        self.assertIn('page', response.context)
+        self.assertContains(response, 'Пользователь: Author.')
+        self.assertContains(response, 'Редактировать')
+
+        response = self.reader_client.get(url)
+        self.assertNotIn('page', response.context)
+        self.assertContains(response, 'Пользователь: Reader.')
+        self.assertContains(response, 'Подписаться')
+        self.assertNotContains(response, 'Редактировать')
+
+        response = self.client.get(url)
+        self.assertIsNone(response.context)
+        self.assertContains(response, 'Регистрация')
+        for private in ('Author.', 'Подписаться', 'Редактировать'):
+            self.assertNotContains(response, private)
+
+    def test_comment_form_has_own_csrf_token(self):
+        url = reverse('post', args=['Author', self.post.id])
+        self.client.get(url)
+        response = self.reader_client.get(url)
+        self.assertNotIn('post_current', response.context)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertContains(
+            response, reverse('add_comment', args=['Author', self.post.id])
+        )
+
+    def test_changes_invalidate_pages(self):
+        post_url = reverse('post', args=['Author', self.post.id])
+        profile_url = reverse('profile', args=['Author'])
+        self.client.get(post_url)
+        self.client.get(profile_url)
+        with capture_on_commit_callbacks(execute=True):
+            self.reader_client.post(
+                reverse('add_comment', args=['Author', self.post.id]),
+                {'text': 'Свежий комментарий'}
+            )
+        self.assertContains(self.client.get(post_url), 'Свежий комментарий')
+        self.assertContains(self.client.get(profile_url), 'Комментариев: 1')
+
+        with capture_on_commit_callbacks(execute=True):
+            self.reader_client.get(
+                reverse('profile_follow', args=['Author'])
+            )
+        response = self.reader_client.get(profile_url)
+        self.assertIn('page', response.context)
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertContains(response, 'Отписаться')
+
+    def test_cached_fragment_keeps_headers(self):
+        for i in range(ITEMS_PER_PAGE):
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+        url = reverse('index_more')
+        first = self.client.get(url)
+        second = self.client.get(url)
+        self.assertIsNone(second.context)
+        self.assertEqual(second['X-Next-Cursor'], first['X-Next-Cursor'])
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_replicas_never_reach_shared_cache(self):
+        """Промах рендерится из основной базы: реплики replica1 нет, и
+        запрос к ней упал бы. Закреплённый клиент кэш обходит."""
+        url = reverse('profile', args=['Author'])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertIsNone(self.client.get(url).context)
+        Post.objects.create(author=self.author, text='Только что')
+        self.client.cookies[PIN_COOKIE] = '1'
+        response = self.client.get(url)
+        self.assertIn('page', response.context)
+        self.assertContains(response, 'Только что')
@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..feeds import index_feed
+from ..models import Comment, Group, Post, User
+from ..read_models import FeedPost
+
+
+class FeedRowsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Writer')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            text='С группой', author=cls.author, group=cls.group
+        )
+        cls.lonely = Post.objects.create(text='Без группы', author=cls.author)
+        Comment.objects.create(post=cls.post, author=cls.author, text='1')
+        Comment.objects.create(post=cls.post, author=cls.author, text='2')
+
+    def test_rows_carry_only_page_columns(self):
+        rows = index_feed()[0:10]
+        by_id = {row.id: row for row in rows}
+        row = by_id[self.post.id]
+        self.assertIsInstance(row, FeedPost)
+        self.assertEqual(row.text_html, self.post.text_html)
+        self.assertEqual(row.author, self.author)
+        self.assertEqual(row.author.username, 'Writer')
+        self.assertEqual(row.group, self.group)
+        self.assertEqual(row.group.slug, 'group')
+        self.assertEqual(row.comment_count, 2)
+        self.assertIsNone(by_id[self.lonely.id].group)
+        self.assertEqual(by_id[self.lonely.id].comment_count, 0)
+        # Автор один на всю страницу:
+        self.assertIs(row.author, by_id[self.lonely.id].author)
+
+    def test_page_queries_do_not_depend_on_rows(self):
+        feed = index_feed()
+        feed.hot_count()
+        # Один запрос к свежим постам и один к архиву, без N+1:
+        with self.assertNumQueries(2):
+            feed[0:10]
+
+    def test_row_equals_model(self):
+        row = index_feed()[0:10][0]
+        self.assertEqual(row, Post.objects.get(id=row.id))
+
+
+class BenchFeedTest(TestCase):
+    def test_bench_feed_reports_both_modes(self):
+        Post.objects.create(text='Пост', author=User.objects.create())
+        out = StringIO()
+        call_command('bench_feed', pages=2, page_size=5, stdout=out)
+        self.assertIn('models', out.getvalue())
+        self.assertIn('rows', out.getvalue())
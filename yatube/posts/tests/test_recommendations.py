@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, FollowSuggestion, User
+from ..recommendations import compute_suggestions
+
+
+class RecommendationsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.alice, cls.bob, cls.carol, cls.dave, cls.erin = (
+            User.objects.create_user(username=name)
+            for name in ('alice', 'bob', 'carol', 'dave', 'erin')
+        )
+        # alice -> bob -> carol, alice -> dave -> carol, dave -> erin
+        for user, author in (
+            (cls.alice, cls.bob), (cls.bob, cls.carol),
+            (cls.alice, cls.dave), (cls.dave, cls.carol),
+            (cls.dave, cls.erin),
+        ):
+            Follow.objects.create(user=user, author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_friends_of_friends_are_ranked_by_paths(self):
+        """Друзья друзей ранжируются по числу путей к ним"""
+        list(compute_suggestions(limit=5, block_size=2))
+        suggested = list(
+            self.alice.follow_suggestions.values_list(
+                'suggested__username', flat=True
+            )
+        )
+        self.assertEqual(suggested, ['carol', 'erin'])
+
+    def test_already_followed_and_self_are_excluded(self):
+        """Не рекомендуем себя и тех, на кого уже подписаны"""
+        list(compute_suggestions())
+        self.assertFalse(FollowSuggestion.objects.filter(
+            user=self.alice, suggested__in=(self.alice, self.bob, self.dave)
+        ).exists())
+
+    def test_limit(self):
+        list(compute_suggestions(limit=1))
+        self.assertEqual(self.alice.follow_suggestions.count(), 1)
+
+    def test_suggestions_on_follow_page(self):
+        """Рекомендации показываются в ленте подписок"""
+        list(compute_suggestions())
+        client = Client()
+        client.force_login(self.alice)
+        response = client.get(reverse('follow_index'))
+        self.assertEqual(
+            response.context['suggestions'][0].suggested, self.carol
+        )
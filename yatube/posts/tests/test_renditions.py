@@ -0,0 +1,93 @@
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post, User
+from ..moderation import delete_images
+from ..renditions import get_renditions, rendition_key
+from .test_storage import upload
+from .utils import capture_on_commit_callbacks
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def fake_thumbnail(source, geometry, **options):
+    # Настоящая нарезка не нужна: проверяем, что и сколько раз просят.
+    return SimpleNamespace(url=f'/media/{geometry}.{options["format"]}')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RenditionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch(
+            'posts.renditions.get_thumbnail', side_effect=fake_thumbnail
+        )
+        self.get_thumbnail = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_feed_serves_picture_from_cache(self):
+        post = Post.objects.create(
+            author=self.user, text='Снимок', image=upload('photo.gif')
+        )
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, '<picture>')
+        self.assertContains(
+            response,
+            '<source type="image/webp" srcset="/media/320x113.WEBP 320w, '
+            '/media/640x226.WEBP 640w, /media/960x339.WEBP 960w"'
+        )
+        self.assertContains(response, 'src="/media/960x339.JPEG"')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertEqual(self.get_thumbnail.call_count, 6)
+
+        self.client.get(reverse('post', args=['Photographer', post.id]))
+        self.assertEqual(self.get_thumbnail.call_count, 6)
+
+    def test_new_post_prepares_renditions(self):
+        self.client.force_login(self.user)
+        with capture_on_commit_callbacks() as callbacks:
+            self.client.post(
+                reverse('new_post'),
+                {'text': 'Снимок', 'image': upload('photo.gif')}
+            )
+        post = Post.objects.get(text='Снимок')
+        # Внутри транзакции миниатюры не режутся:
+        self.assertEqual(self.get_thumbnail.call_count, 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get_thumbnail.call_count, 6)
+        self.assertIn(rendition_key(post.image.name), cache)
+
+        delete_images([post.image.name])
+        self.assertIn(rendition_key(post.image.name), cache)
+        Post.objects.filter(pk=post.pk).delete()
+        with mock.patch('posts.storage.REUSE_GRACE', 0):
+            delete_images([post.image.name])
+        self.assertNotIn(rendition_key(post.image.name), cache)
+
+    def test_broken_image_is_not_retried_on_every_render(self):
+        self.get_thumbnail.side_effect = IOError
+        Post.objects.create(
+            author=self.user, text='Битый', image='posts/missing.jpg'
+        )
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, 'Битый')
+        self.assertNotContains(response, '<picture>')
+        self.assertIsNone(get_renditions('posts/missing.jpg'))
+        self.assertEqual(self.get_thumbnail.call_count, 1)
@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..models import Group, User
+from ..resolvers import resolve_group, resolve_user
+
+
+class ResolversTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='ResolveTester', first_name='Имя'
+        )
+        cls.group = Group.objects.create(title='Resolve', slug='resolve')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_second_lookup_costs_no_queries(self):
+        """Повторное разрешение username и slug не ходит в базу"""
+        resolve_user(self.user.username)
+        resolve_group(self.group.slug)
+        with self.assertNumQueries(0):
+            user = resolve_user(self.user.username)
+            group = resolve_group(self.group.slug)
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.get_full_name(), 'Имя')
+        self.assertEqual(group, self.group)
+
+    def test_missing_names_are_cached(self):
+        """Несуществующее имя тоже кэшируется"""
+        self.assertIsNone(resolve_user('nobody'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(resolve_user('nobody'))
+
+    def test_changes_invalidate_cache(self):
+        """Создание и переименование сбрасывают кэш"""
+        self.assertIsNone(resolve_user('newcomer'))
+        User.objects.create_user(username='newcomer')
+        self.assertIsNotNone(resolve_user('newcomer'))
+
+        group = Group.objects.get(pk=self.group.pk)
+        resolve_group(group.slug)
+        group.slug = 'renamed'
+        group.save()
+        self.assertIsNone(resolve_group('resolve'))
+        self.assertEqual(resolve_group('renamed'), group)
@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import tempfile
+
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import (RequestFactory, TestCase, TransactionTestCase,
+                         override_settings)
+
+from yatube.routers import (PIN_COOKIE, ReplicaPinningMiddleware,
+                            ReplicaRouter, primary_reads, replica_reads)
+
+from ..models import Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def run_view(self, view, cookies=None):
+        request = self.factory.get('/')
+        request.COOKIES.update(cookies or {})
+        middleware = ReplicaPinningMiddleware(view)
+        return middleware(request)
+
+    def test_replica_reads_use_replica(self):
+        """Чтения внутри replica_reads идут на реплику, записи в default"""
+        seen = {}
+
+        @replica_reads
+        def view(request):
+            seen['read'] = self.router.db_for_read(Post)
+            seen['write'] = self.router.db_for_write(Post)
+            seen['read_after_write'] = self.router.db_for_read(Post)
+            return HttpResponse()
+
+        response = self.run_view(view)
+        self.assertEqual(seen['read'], 'replica1')
+        self.assertEqual(seen['write'], 'default')
+        self.assertEqual(seen['read_after_write'], 'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_reads_outside_replica_views_use_default(self):
+        """Без replica_reads чтения идут в основную базу"""
+        seen = {}
+
+        def view(request):
+            seen['read'] = self.router.db_for_read(User)
+            return HttpResponse()
+
+        response = self.run_view(view)
+        self.assertEqual(seen['read'], 'default')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_pinned_client_reads_from_default(self):
+        """После записи клиент читает свои данные из основной базы"""
+        seen = {}
+
+        @replica_reads
+        def view(request):
+            seen['read'] = self.router.db_for_read(Post)
+            return HttpResponse()
+
+        self.run_view(view, cookies={PIN_COOKIE: '1'})
+        self.assertEqual(seen['read'], 'default')
+
+    def test_primary_reads_inside_replica_view(self):
+        """Блок primary_reads читает из default и после выбора реплики"""
+        seen = {}
+
+        @replica_reads
+        def view(request):
+            with primary_reads():
+                seen['inside'] = self.router.db_for_read(Post)
+            seen['after'] = self.router.db_for_read(Post)
+            return HttpResponse()
+
+        self.run_view(view)
+        self.assertEqual(seen, {'inside': 'default', 'after': 'replica1'})
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class LocalReplicaTest(TransactionTestCase):
+    """Настоящая копия тестовой базы в файле в роли реплики."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        Post.objects.create(author=self.author, text='Есть на реплике')
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+        connections.databases['replica1'] = dict(
+            connections.databases['default'], NAME=path, TEST={}
+        )
+        self.addCleanup(self.drop_replica)
+        Post.objects.create(author=self.author, text='Только в основной')
+
+    def drop_replica(self):
+        connections['replica1'].close()
+        del connections.databases['replica1']
+        del connections._connections.replica1
+
+    def texts(self, cookies=None):
+        @replica_reads
+        def view(request):
+            return HttpResponse(
+                ','.join(Post.objects.values_list('text', flat=True))
+            )
+
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies or {})
+        return ReplicaPinningMiddleware(view)(request).content.decode()
+
+    def test_read_is_served_by_replica_copy(self):
+        self.assertEqual(self.texts(), 'Есть на реплике')
+        self.assertEqual(
+            self.texts({PIN_COOKIE: '1'}),
+            'Только в основной,Есть на реплике'
+        )
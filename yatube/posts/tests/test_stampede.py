@@ -0,0 +1,101 @@
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+
+from yatube.stampede import StampedeCache
+
+
+def make_cache(**options):
+    return StampedeCache('', {
+        'OPTIONS': {
+            'CACHE': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'stampede-tests',
+            },
+            **options,
+        },
+    })
+
+
+class StampedeCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = make_cache(STALE_TIMEOUT=60, BETA=1.0)
+        self.cache.clear()
+
+    def at(self, moment):
+        return mock.patch('yatube.stampede.time.time', return_value=moment)
+
+    def test_one_worker_recomputes_others_get_stale(self):
+        with self.at(1000):
+            self.cache.set('page', 'old', 10)
+        with self.at(1011):
+            self.assertIsNone(self.cache.get('page'))
+            self.assertEqual(self.cache.get('page'), 'old')
+            self.assertEqual(self.cache.get('page'), 'old')
+        with self.at(1012):
+            self.cache.set('page', 'new', 10)
+            self.assertEqual(self.cache.get('page'), 'new')
+        self.assertEqual(
+            self.cache.metrics(),
+            {'recomputes': 1, 'early': 0, 'coalesced': 2}
+        )
+
+    def test_stale_value_disappears_after_grace(self):
+        with self.at(1000):
+            self.cache.set('page', 'old', 10)
+        with self.at(1000 + 10 + 61):
+            self.assertIsNone(self.cache.get('page'))
+
+    def test_early_refresh_near_expiry(self):
+        with self.at(1000):
+            self.cache.get('count')
+        with self.at(1005):
+            # Пересчёт длился 5 секунд — за секунду до срока пора обновлять.
+            self.cache.set('count', 42, 60)
+        with self.at(1064), mock.patch(
+            'yatube.stampede.random.random', return_value=0.5
+        ):
+            self.assertIsNone(self.cache.get('count'))
+            self.assertEqual(self.cache.get('count'), 42)
+        self.assertEqual(self.cache.metrics()['early'], 1)
+
+    def test_fresh_value_far_from_expiry(self):
+        self.cache.set('count', 42, 60)
+        with mock.patch('yatube.stampede.random.random', return_value=0.5):
+            self.assertEqual(self.cache.get('count'), 42)
+        self.assertEqual(self.cache.metrics()['recomputes'], 0)
+
+    def test_values_without_timeout_support_incr(self):
+        self.assertEqual(self.cache.get_or_set('version', 1, None), 1)
+        self.cache.incr('version')
+        self.assertEqual(self.cache.get('version'), 2)
+
+    def test_add_replaces_expired_value(self):
+        with self.at(1000):
+            self.cache.set('key', 'old', 10)
+            self.assertFalse(self.cache.add('key', 'other', 10))
+        with self.at(1020):
+            self.assertTrue(self.cache.add('key', 'new', 10))
+            self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_cache_stats_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            shared = {'default': {
+                'BACKEND': 'yatube.stampede.StampedeCache',
+                'OPTIONS': {'CACHE': {
+                    'BACKEND':
+                        'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': directory,
+                }},
+            }}
+            with override_settings(CACHES=shared):
+                out = StringIO()
+                call_command('cache_stats', stdout=out)
+        self.assertIn('coalesced', out.getvalue())
+
+    def test_cache_stats_refuses_process_local_cache(self):
+        with self.assertRaises(CommandError):
+            call_command('cache_stats', stdout=StringIO())
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from ..models import Post, User
+from ..moderation import delete_images
+from ..storage import REUSE_GRACE, post_images, reuse_marker
+from .test_moderation import GIF
+from .utils import capture_on_commit_callbacks
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+PNG = (
+    b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01'
+    b'\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\rIDATx\x9cc\xf8\xff'
+    b'\xff?\x03\x00\x08\xfc\x02\xfe\xa7\x9a\xa0\xa0\x00\x00\x00\x00IEND'
+    b'\xaeB`\x82'
+)
+
+
+def upload(name, content=GIF, content_type='image/gif'):
+    return SimpleUploadedFile(name, content, content_type)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Memer')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def post(self, image):
+        return Post.objects.create(author=self.user, text='Мем', image=image)
+
+    def test_same_upload_is_stored_once(self):
+        first = self.post(upload('meme.GIF'))
+        second = self.post(upload('copy.gif'))
+        digest = hashlib.sha256(GIF).hexdigest()
+        self.assertEqual(
+            first.image.name, f'posts/{digest[:2]}/{digest[2:]}.gif'
+        )
+        self.assertEqual(second.image.name, first.image.name)
+        blob = os.path.basename(first.image.path)
+        self.assertEqual(
+            sorted(os.listdir(os.path.dirname(first.image.path))),
+            [blob, f'{blob}.reused']
+        )
+        options = {'crop': 'center', 'format': 'JPEG'}
+        self.assertEqual(*[
+            default.backend._get_thumbnail_filename(
+                ImageFile(post.image), '960x339', options
+            )
+            for post in (first, second)
+        ])
+
+    def test_blob_is_deleted_with_last_reference(self):
+        first = self.post(upload('meme.gif'))
+        second = self.post(upload('meme.gif'))
+        path = first.image.path
+
+        Post.objects.filter(pk=first.pk).delete()
+        delete_images([first.image.name])
+        self.assertTrue(os.path.exists(path))
+
+        Post.objects.filter(pk=second.pk).delete()
+        with mock.patch('posts.storage.REUSE_GRACE', 0):
+            delete_images([second.image.name])
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(reuse_marker(path)))
+
+    def test_recently_reused_blob_survives_release(self):
+        # Вторая загрузка могла взять файл, пока её пост не закоммичен:
+        # ссылок на него ещё нет, но удалять файл нельзя.
+        post = self.post(upload('meme.gif'))
+        Post.objects.filter(pk=post.pk).delete()
+        post_images.save('posts/again.gif', upload('again.gif'))
+        delete_images([post.image.name])
+        self.assertTrue(os.path.exists(post.image.path))
+
+        stale = time.time() - REUSE_GRACE - 1
+        os.utime(reuse_marker(post.image.path), (stale, stale))
+        delete_images([post.image.name])
+        self.assertFalse(os.path.exists(post.image.path))
+
+    def test_edit_releases_replaced_image(self):
+        post = self.post(upload('meme.gif'))
+        old = post.image.path
+        self.client.force_login(self.user)
+        with mock.patch('posts.storage.REUSE_GRACE', 0):
+            with capture_on_commit_callbacks() as callbacks:
+                self.client.post(
+                    reverse('post_edit', args=['Memer', post.id]),
+                    {'text': 'Другой мем',
+                     'image': upload('new.png', PNG, 'image/png')}
+                )
+            post.refresh_from_db()
+            self.assertTrue(post.image.name.endswith('.png'))
+            # До коммита старый файл на месте: откат оставит пост с ним.
+            self.assertTrue(os.path.exists(old))
+            for callback in callbacks:
+                callback()
+        self.assertFalse(os.path.exists(old))
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from yatube.settings import ITEMS_PER_PAGE
+
+from ..models import Group, Post, User
+from ..streaming import STREAM_MARKER
+
+
+@override_settings(STREAM_FEEDS=True)
+class StreamFeedsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Streamer')
+        cls.group = Group.objects.create(title='Поток', slug='stream')
+        for i in range(ITEMS_PER_PAGE + 1):
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Пост номер {i}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(StreamFeedsTest.user)
+
+    def test_shell_is_sent_before_cards(self):
+        urls = (
+            reverse('index'),
+            reverse('group_posts', args=[StreamFeedsTest.group.slug]),
+            reverse('profile', args=[StreamFeedsTest.user.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                chunks = [
+                    chunk.decode() for chunk in response.streaming_content
+                ]
+                self.assertEqual(len(chunks), ITEMS_PER_PAGE + 2)
+                self.assertIn('<head>', chunks[0])
+                self.assertNotIn('Пост номер', chunks[0])
+                self.assertIn(f'Пост номер {ITEMS_PER_PAGE}', chunks[1])
+                self.assertIn('feed-more', chunks[-1])
+                self.assertIn('</html>', chunks[-1])
+                self.assertNotIn(STREAM_MARKER, ''.join(chunks))
+
+    @override_settings(STREAM_FEEDS=False)
+    def test_streaming_is_off_by_default(self):
+        response = self.client.get(reverse('index'))
+        self.assertFalse(response.streaming)
+        self.assertContains(response, f'Пост номер {ITEMS_PER_PAGE}')
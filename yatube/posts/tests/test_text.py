@@ -0,0 +1,49 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+
+class PrerenderedTextTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TextTester')
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_html_is_rendered_on_save(self):
+        """При сохранении текст экранируется, переносы становятся <br>"""
+        post = Post.objects.create(
+            author=self.user, text='<b>Жирный</b>\nвторая   строка'
+        )
+        self.assertEqual(
+            post.text_html, '&lt;b&gt;Жирный&lt;/b&gt;<br>вторая   строка'
+        )
+        self.assertEqual(post.excerpt, '<b>Жирный</b> вторая строка')
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='a\nb'
+        )
+        self.assertEqual(comment.text_html, 'a<br>b')
+
+    def test_page_outputs_stored_html(self):
+        post = Post.objects.create(author=self.user, text='<i>x</i>\ny')
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, '&lt;i&gt;x&lt;/i&gt;<br>y')
+        self.assertNotContains(response, '<i>x</i>')
+        self.assertEqual(response.context['page'][0], post)
+
+    def test_backfill_command(self):
+        """Команда render_texts заполняет HTML у старых строк"""
+        post = Post.objects.create(author=self.user, text='a\nb')
+        Post.objects.filter(pk=post.pk).update(text_html='', excerpt='')
+        call_command('render_texts', batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'a<br>b')
+        self.assertEqual(post.excerpt, 'a b')
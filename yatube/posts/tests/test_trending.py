@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import ActivityBucket, Comment, Group, Post, User
+from ..trending import (get_trending, rebuild_buckets, record_activity,
+                        update_trending)
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TrendTester')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.group = Group.objects.create(title='Hot', slug='hot')
+        cls.hot = Post.objects.create(author=cls.user, text='Hot post')
+        cls.cold = Post.objects.create(author=cls.user, text='Cold post')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_record_activity_increments_bucket(self):
+        """Повторная активность в том же интервале увеличивает счётчик"""
+        record_activity(ActivityBucket.POST, self.hot.id)
+        record_activity(ActivityBucket.POST, self.hot.id)
+        self.assertEqual(ActivityBucket.objects.get().count, 2)
+
+    def test_recent_activity_scores_higher(self):
+        """Свежая активность весит больше старой"""
+        now = timezone.now()
+        record_activity(ActivityBucket.POST, self.hot.id, now, amount=3)
+        record_activity(
+            ActivityBucket.POST, self.cold.id, now - timedelta(hours=24),
+            amount=5
+        )
+        update_trending(now)
+        cache.clear()
+        ids = [item['id'] for item in get_trending(ActivityBucket.POST)]
+        self.assertEqual(ids, [self.hot.id, self.cold.id])
+
+    def test_views_feed_the_counters(self):
+        """Комментарий и пост в группе попадают в счётчики активности"""
+        self.authorized_client.post(
+            reverse('add_comment', args=(self.user.username, self.hot.id)),
+            data={'text': 'Comment'}
+        )
+        self.authorized_client.post(
+            reverse('new_post'), data={'text': 'New', 'group': self.group.id}
+        )
+        update_trending()
+        self.assertEqual(
+            get_trending(ActivityBucket.POST)[0]['id'], self.hot.id
+        )
+        self.assertEqual(
+            get_trending(ActivityBucket.GROUP)[0]['slug'], self.group.slug
+        )
+        response = self.authorized_client.get(reverse('index'))
+        self.assertContains(response, 'В тренде')
+
+    def test_rebuild_buckets(self):
+        """Счётчики можно пересобрать из комментариев"""
+        Comment.objects.create(post=self.cold, author=self.user, text='1')
+        rebuild_buckets()
+        self.assertEqual(
+            ActivityBucket.objects.get(kind=ActivityBucket.POST).object_id,
+            self.cold.id
+        )
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, User
+from ..typeahead import (VERSION_KEY, PrefixIndex, Typeahead, change_key,
+                         typeahead)
+
+
+class PrefixIndexTest(TestCase):
+    def test_search_dedupes_and_limits(self):
+        index = PrefixIndex()
+        index.add(1, 'Анна', ['anna', 'Анна', 'Каренина', 'Анна Каренина'])
+        index.add(2, 'Андрей', ['andrey', 'Андрей'])
+        index.add(3, 'Борис', ['boris'])
+        self.assertEqual(index.search('ан', 10), ['Андрей', 'Анна'])
+        self.assertEqual(index.search('ан', 1), ['Андрей'])
+        self.assertEqual(index.search('кар', 10), ['Анна'])
+        index.add(2, 'Андрей', ['andy'])
+        index.remove(1)
+        index.remove(1)
+        self.assertEqual(index.search('ан', 10), [])
+        self.assertEqual(index.search('and', 10), ['Андрей'])
+
+    def test_build_matches_incremental_adds(self):
+        entries = [
+            (1, 'Анна', ['anna', 'Анна', 'Каренина']),
+            (2, 'Андрей', ['andrey', 'Андрей', 'Анна']),
+        ]
+        index = PrefixIndex()
+        for entry in entries:
+            index.add(*entry)
+        built = PrefixIndex.build(entries)
+        self.assertEqual(built.keys, index.keys)
+        self.assertEqual(built.items, index.items)
+        built.remove(1)
+        self.assertEqual(built.search('ан', 10), ['Андрей'])
+
+
+class TypeaheadTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.leo = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Русская литература', slug='literature', description='-'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.typeahead = Typeahead()
+
+    def titles(self, prefix):
+        return [item['title'] for item in self.typeahead.search(prefix)]
+
+    def test_search_without_queries(self):
+        self.assertEqual(self.titles('тол'), ['Лев Толстой'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles('ЛЕВ Т'), ['Лев Толстой'])
+            self.assertEqual(self.titles('LEO'), ['Лев Толстой'])
+            self.assertEqual(self.titles('лит'), ['Русская литература'])
+            self.assertEqual(self.titles(''), [])
+
+    def test_changes_are_applied_incrementally(self):
+        self.titles('л')
+        with mock.patch.object(Typeahead, 'rebuild') as rebuild:
+            User.objects.create_user(username='lermontov')
+            self.group.title = 'Классика'
+            self.group.save()
+            Group.objects.create(title='Лирика', slug='lyrics')
+            self.leo.is_active = False
+            self.leo.save()
+            self.assertEqual(self.titles('l'), ['lermontov'])
+            self.assertEqual(self.titles('л'), ['Лирика'])
+            self.assertEqual(self.titles('кл'), ['Классика'])
+        rebuild.assert_not_called()
+
+    def test_rebuilds_when_changes_are_lost(self):
+        self.titles('л')
+        User.objects.create_user(username='lermontov')
+        cache.delete(change_key(cache.get(VERSION_KEY)))
+        self.assertEqual(self.titles('le'), ['Лев Толстой', 'lermontov'])
+
+    def test_users_shadowed_by_routes_are_not_listed(self):
+        User.objects.create_user(username='tagger')
+        User.objects.create_user(username='tag')
+        self.assertEqual(self.titles('tag'), ['tagger'])
+        self.typeahead.version = None
+        self.assertEqual(self.titles('tag'), ['tagger'])
+
+    def test_endpoint(self):
+        typeahead.version = None
+        response = self.client.get(reverse('typeahead'), {'q': 'рус'})
+        self.assertEqual(response.json(), {'results': [{
+            'kind': 'group',
+            'title': 'Русская литература',
+            'url': reverse('group_posts', args=['literature']),
+        }]})
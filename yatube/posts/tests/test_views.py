@@ -10,6 +10,7 @@ from django.urls import reverse
 
 from yatube.settings import ITEMS_PER_PAGE
 
+from ..feeds import feed_cursor
 from ..models import Comment, Follow, Group, Post, User
 
 MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -314,6 +315,66 @@ class PaginatorViewsTest(TestCase):
                     3
                 )
 
+    def test_fragments_continue_from_cursor(self):
+        reverse_names = {
+            reverse('index_more'),
+            reverse(
+                'group_more',
+                kwargs={'slug': PaginatorViewsTest.group.slug}
+            ),
+            reverse(
+                'profile_more',
+                kwargs={'username': PaginatorViewsTest.user.username}
+            ),
+        }
+        for reverse_name in reverse_names:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.guest_client.get(reverse_name)
+                self.assertTemplateNotUsed(response, 'base.html')
+                posts = response.context.get('posts')
+                self.assertEqual(len(posts), ITEMS_PER_PAGE)
+                cursor = feed_cursor(posts[-1])
+                self.assertEqual(response['X-Next-Cursor'], cursor)
+                self.assertContains(
+                    response, f'{reverse_name}?cursor={cursor}'
+                )
+                response = self.guest_client.get(
+                    f'{reverse_name}?cursor={cursor}'
+                )
+                self.assertEqual(len(response.context.get('posts')), 3)
+                self.assertNotIn('X-Next-Cursor', response)
+                self.assertNotContains(response, 'feed-more')
+
+    def test_page_links_fragment_after_its_last_post(self):
+        response = self.guest_client.get(reverse('index'))
+        last = response.context['page'].object_list[-1]
+        self.assertContains(
+            response, f'{reverse("index_more")}?cursor={feed_cursor(last)}'
+        )
+
+    def test_new_post_does_not_repeat_shown_ones(self):
+        url = reverse('index_more')
+        first = self.guest_client.get(url)
+        Post.objects.create(author=PaginatorViewsTest.user, text='Свежий')
+        cache.clear()
+        second = self.guest_client.get(
+            f'{url}?cursor={first["X-Next-Cursor"]}'
+        )
+        shown = [post.id for post in first.context['posts']]
+        more = [post.id for post in second.context['posts']]
+        self.assertEqual(len(more), 3)
+        self.assertFalse(set(shown) & set(more))
+
+    def test_follow_fragment_shows_followed_authors(self):
+        follower = User.objects.create_user(username='Scroller')
+        Follow.objects.create(user=follower, author=PaginatorViewsTest.user)
+        client = Client()
+        client.force_login(follower)
+        response = client.get(reverse('follow_more'))
+        self.assertEqual(
+            len(response.context.get('posts')), ITEMS_PER_PAGE
+        )
+
 
 @override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class GroupViewsTest(TestCase):
@@ -0,0 +1,83 @@
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from yatube.settings import ITEMS_PER_PAGE
+
+from ..feeds import feed_cursor
+from ..models import Comment, Group, Post, User
+from ..warmup import warm, warm_urls
+
+
+class WarmCachesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Busy')
+        cls.quiet = User.objects.create_user(username='Quiet')
+        cls.group = Group.objects.create(title='Группа', slug='warm')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {i}')
+            for i in range(ITEMS_PER_PAGE + 1)
+        ]
+        cls.quiet_post = Post.objects.create(
+            author=cls.quiet, text='Тихий', group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.quiet, text='Первый'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_urls_cover_feeds_profiles_and_posts(self):
+        urls = warm_urls(pages=2, profiles=1, posts=1)
+        self.assertEqual(urls[:3], [
+            reverse('index'),
+            reverse('index') + '?page=2',
+            # Первая страница — тихий пост и четыре последних поста:
+            reverse('index_more')
+            + f'?cursor={feed_cursor(self.posts[-4])}',
+        ])
+        self.assertIn(reverse('group_posts', args=['warm']), urls)
+        self.assertIn(reverse('profile', args=['Busy']), urls)
+        self.assertNotIn(reverse('profile', args=['Quiet']), urls)
+        self.assertEqual(
+            urls[-1], reverse('post', args=['Busy', self.posts[0].id])
+        )
+
+    def test_warm_reports_each_url(self):
+        urls = ['/', '/no-such-user/']
+        results = list(warm(urls, lambda url: len(url), concurrency=2))
+        self.assertEqual(
+            [(url, status) for url, status, _ in results],
+            [('/', 1), ('/no-such-user/', 14)]
+        )
+
+    def test_process_local_cache_needs_url(self):
+        with self.assertRaises(CommandError):
+            call_command('warm_caches', stdout=StringIO())
+
+    def test_pages_are_served_from_cache_afterwards(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        shared = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directory.name,
+        }})
+        shared.enable()
+        self.addCleanup(shared.disable)
+        out = StringIO()
+        call_command('warm_caches', concurrency=1, stdout=out)
+        self.assertIn('Прогрето страниц', out.getvalue())
+        for url in (
+            reverse('index'),
+            reverse('group_posts', args=['warm']),
+            reverse('profile', args=['Busy']),
+            reverse('post', args=['Busy', self.posts[0].id]),
+        ):
+            with self.subTest(url=url):
+                self.assertIsNone(self.client.get(url).context)
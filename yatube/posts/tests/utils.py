@@ -0,0 +1,40 @@
+import tempfile
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+
+
+@contextmanager
+def capture_on_commit_callbacks(*, using=DEFAULT_DB_ALIAS, execute=False):
+    """TestCase.captureOnCommitCallbacks из Django 3.2: в TestCase
+    транзакция теста не коммитится, и колбэки on_commit без этого
+    не выполнились бы никогда."""
+    callbacks = []
+    start = len(connections[using].run_on_commit)
+    try:
+        yield callbacks
+    finally:
+        while True:
+            run_on_commit = connections[using].run_on_commit[start:]
+            if not run_on_commit:
+                break
+            start += len(run_on_commit)
+            for _, callback in run_on_commit:
+                callbacks.append(callback)
+                if execute:
+                    callback()
+            if not execute:
+                break
+
+
+@contextmanager
+def shared_cache():
+    """Кэш в файлах вместо LocMemCache: команды-воркеры с кэшем в памяти
+    процесса не запускаются."""
+    with tempfile.TemporaryDirectory() as directory:
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directory,
+        }}):
+            yield
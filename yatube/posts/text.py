@@ -0,0 +1,14 @@
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 150
+
+
+def render_text(text):
+    """То же, что {{ text|linebreaksbr }} в шаблоне, но один раз при
+    сохранении: экранируем и превращаем переносы строк в <br>."""
+    return str(linebreaksbr(text))
+
+
+def make_excerpt(text):
+    return Truncator(' '.join(text.split())).chars(EXCERPT_LENGTH)
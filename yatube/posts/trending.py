@@ -0,0 +1,146 @@
+import heapq
+import json
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ActivityBucket, Comment, Group, Post, TrendingList
+
+BUCKET_SECONDS = 60 * 60
+WINDOW = timedelta(hours=48)
+HALF_LIFE_HOURS = 6
+TOP_K = 5
+CACHE_TIMEOUT = 60
+
+
+def bucket_start(moment):
+    timestamp = int(moment.timestamp()) // BUCKET_SECONDS * BUCKET_SECONDS
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def record_activity(kind, object_id, moment=None, amount=1):
+    """Увеличивает счётчик текущего интервала одним UPDATE; строку
+    интервала создаём, только если её ещё нет."""
+    lookup = {
+        'kind': kind,
+        'object_id': object_id,
+        'bucket': bucket_start(moment or timezone.now()),
+    }
+    buckets = ActivityBucket.objects.filter(**lookup)
+    if buckets.update(count=F('count') + amount):
+        return
+    try:
+        with transaction.atomic():
+            ActivityBucket.objects.create(count=amount, **lookup)
+    except IntegrityError:
+        buckets.update(count=F('count') + amount)
+
+
+def decayed_scores(kind, now):
+    """Сумма счётчиков за окно, где вклад интервала убывает вдвое
+    каждые HALF_LIFE_HOURS часов."""
+    scores = defaultdict(float)
+    rows = ActivityBucket.objects.filter(
+        kind=kind, bucket__gte=now - WINDOW
+    ).values_list('object_id', 'bucket', 'count')
+    for object_id, bucket, count in rows.iterator():
+        age = (now - bucket).total_seconds() / 3600
+        scores[object_id] += count * 0.5 ** (age / HALF_LIFE_HOURS)
+    return heapq.nlargest(TOP_K, scores.items(), key=itemgetter(1))
+
+
+def top_posts(now):
+    top = decayed_scores(ActivityBucket.POST, now)
+    posts = Post.objects.select_related('author').in_bulk(
+        [post_id for post_id, _ in top]
+    )
+    return [
+        {
+            'id': post_id,
+            'username': posts[post_id].author.username,
+            'text': posts[post_id].excerpt or posts[post_id].text[:60],
+            'score': round(score, 2),
+        }
+        for post_id, score in top if post_id in posts
+    ]
+
+
+def top_groups(now):
+    top = decayed_scores(ActivityBucket.GROUP, now)
+    groups = Group.objects.in_bulk([group_id for group_id, _ in top])
+    return [
+        {
+            'slug': groups[group_id].slug,
+            'title': groups[group_id].title,
+            'score': round(score, 2),
+        }
+        for group_id, score in top if group_id in groups
+    ]
+
+
+def update_trending(now=None):
+    """Пересчитывает топы, сохраняет их и выбрасывает устаревшие
+    интервалы. Запускается периодически командой update_trending."""
+    now = now or timezone.now()
+    for kind, builder in (
+        (ActivityBucket.POST, top_posts),
+        (ActivityBucket.GROUP, top_groups),
+    ):
+        items = builder(now)
+        TrendingList.objects.update_or_create(
+            kind=kind,
+            defaults={'items': json.dumps(items, ensure_ascii=False)}
+        )
+        cache.set(f'trending:{kind}', items, CACHE_TIMEOUT)
+    ActivityBucket.objects.filter(bucket__lt=now - WINDOW).delete()
+
+
+def rebuild_buckets(now=None):
+    """Заново собирает интервалы за окно из комментариев и постов,
+    например после первого деплоя или потери счётчиков."""
+    now = now or timezone.now()
+    since = now - WINDOW
+    counters = {
+        ActivityBucket.POST: Counter(
+            (post_id, bucket_start(created))
+            for post_id, created in Comment.objects.filter(
+                created__gte=since
+            ).values_list('post_id', 'created').iterator()
+        ),
+        ActivityBucket.GROUP: Counter(
+            (group_id, bucket_start(pub_date))
+            for group_id, pub_date in Post.objects.filter(
+                pub_date__gte=since, group__isnull=False
+            ).values_list('group_id', 'pub_date').iterator()
+        ),
+    }
+    with transaction.atomic():
+        ActivityBucket.objects.all().delete()
+        ActivityBucket.objects.bulk_create(
+            (
+                ActivityBucket(
+                    kind=kind, object_id=object_id, bucket=bucket,
+                    count=count
+                )
+                for kind, counter in counters.items()
+                for (object_id, bucket), count in counter.items()
+            ),
+            batch_size=500
+        )
+
+
+def get_trending(kind):
+    key = f'trending:{kind}'
+    items = cache.get(key)
+    if items is None:
+        row = TrendingList.objects.filter(kind=kind).values_list(
+            'items', flat=True
+        ).first()
+        items = json.loads(row) if row else []
+        cache.set(key, items, CACHE_TIMEOUT)
+    return items
@@ -0,0 +1,192 @@
+"""Подсказки по пользователям и группам для поиска в шапке сайта.
+
+Каждый процесс держит в памяти отсортированный список пар
+(слово в casefold, ссылка на объект); поиск по префиксу — bisect и
+несколько шагов по списку, без запросов к базе. Слова: username, имя,
+фамилия и полное имя пользователя, название группы и каждое его слово.
+
+Изменения расходятся по процессам через кэш: сигнал увеличивает номер
+версии и кладёт под этим номером само изменение. Перед поиском процесс
+сверяет свою версию с общей и применяет недостающие изменения; если
+какое-то уже выпало из кэша, индекс строится заново из базы."""
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from .models import Group, User
+from .resolvers import reserved_usernames
+
+VERSION_KEY = 'typeahead:version'
+CHANGE_TIMEOUT = 60 * 60
+MAX_CHANGES = 1000
+SEARCH_LIMIT = 8
+USER, GROUP = 'user', 'group'
+
+
+def change_key(version):
+    return f'typeahead:change:{version}'
+
+
+def current_version():
+    # После очистки кэша счёт начинается с текущего времени в мс, а не
+    # с нуля, чтобы не совпасть с версией, которую процесс уже видел.
+    return cache.get_or_set(
+        VERSION_KEY, lambda: int(time.time() * 1000), None
+    )
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.keys = []
+        self.items = {}
+
+    @classmethod
+    def build(cls, entries):
+        """Индекс из (ссылка, объект, слова) одной сортировкой: add
+        вставляет по ключу через insort, и на миллионах пользователей
+        сборка через него была бы квадратичной."""
+        index = cls()
+        for ref, item, words in entries:
+            keys = index.keys_for(words)
+            index.keys.extend((key, ref) for key in keys)
+            index.items[ref] = (item, keys)
+        index.keys.sort()
+        return index
+
+    @staticmethod
+    def keys_for(words):
+        return sorted({word.casefold() for word in words if word})
+
+    def add(self, ref, item, words):
+        self.remove(ref)
+        keys = self.keys_for(words)
+        for key in keys:
+            insort(self.keys, (key, ref))
+        self.items[ref] = (item, keys)
+
+    def remove(self, ref):
+        item = self.items.pop(ref, None)
+        if item is None:
+            return
+        for key in item[1]:
+            del self.keys[bisect_left(self.keys, (key, ref))]
+
+    def search(self, prefix, limit):
+        found = []
+        seen = set()
+        start = bisect_left(self.keys, (prefix,))
+        for position in range(start, len(self.keys)):
+            key, ref = self.keys[position]
+            if not key.startswith(prefix) or len(found) == limit:
+                break
+            if ref not in seen:
+                seen.add(ref)
+                found.append(self.items[ref][0])
+        return found
+
+
+def user_entry(user):
+    full_name = f'{user.first_name} {user.last_name}'.strip()
+    item = {
+        'kind': USER,
+        'title': full_name or user.username,
+        'username': user.username,
+        'url': reverse('profile', args=[user.username]),
+    }
+    words = (user.username, user.first_name, user.last_name, full_name)
+    return item, words
+
+
+def group_entry(group):
+    item = {
+        'kind': GROUP,
+        'title': group.title,
+        'url': reverse('group_posts', args=[group.slug]),
+    }
+    return item, [group.title] + group.title.split()
+
+
+class Typeahead:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = None
+        self.version = None
+
+    def entries(self):
+        users = User.objects.filter(is_active=True).exclude(
+            username__in={''} | reserved_usernames()
+        ).only('id', 'username', 'first_name', 'last_name')
+        for user in users.iterator():
+            yield ((USER, user.pk), *user_entry(user))
+        for group in Group.objects.only('id', 'title', 'slug').iterator():
+            yield ((GROUP, group.pk), *group_entry(group))
+
+    def rebuild(self, version):
+        self.index = PrefixIndex.build(self.entries())
+        self.version = version
+
+    def refresh(self):
+        version = current_version()
+        if self.version == version:
+            return
+        if (self.version is None
+                or not 0 < version - self.version <= MAX_CHANGES):
+            self.rebuild(version)
+            return
+        wanted = [
+            change_key(number)
+            for number in range(self.version + 1, version + 1)
+        ]
+        changes = cache.get_many(wanted)
+        if len(changes) < len(wanted):
+            self.rebuild(version)
+            return
+        for key in wanted:
+            ref, entry = changes[key]
+            if entry is None:
+                self.index.remove(ref)
+            else:
+                self.index.add(ref, *entry)
+        self.version = version
+
+    def search(self, prefix, limit=SEARCH_LIMIT):
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        with self.lock:
+            self.refresh()
+            return self.index.search(prefix, limit)
+
+
+typeahead = Typeahead()
+
+
+def publish(ref, entry):
+    """Сообщает всем процессам об изменении; entry=None — удаление."""
+    current_version()
+    version = cache.incr(VERSION_KEY)
+    cache.set(change_key(version), (ref, entry), CHANGE_TIMEOUT)
+
+
+def user_changed(user):
+    # Профиль со «служебным» именем не открыть: адрес перехватит маршрут.
+    listed = (
+        user.is_active and user.username
+        and user.username not in reserved_usernames()
+    )
+    publish((USER, user.pk), user_entry(user) if listed else None)
+
+
+def user_removed(user_id):
+    publish((USER, user_id), None)
+
+
+def group_changed(group):
+    publish((GROUP, group.pk), group_entry(group))
+
+
+def group_removed(group_id):
+    publish((GROUP, group_id), None)
@@ -6,9 +6,16 @@ urlpatterns = [
     path('404/', views.page_not_found, name='page_not_found'),
     path('500/', views.server_error, name='server_error'),
     path('', views.index, name='index'),
+    path('more/', views.index_more, name='index_more'),
     path('new/', views.new_post, name='new_post'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
+    path('group/<slug:slug>/more/', views.group_more, name='group_more'),
+    path('groups/search/', views.group_search, name='group_search'),
+    path('typeahead/', views.typeahead_search, name='typeahead'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/more/', views.follow_more, name='follow_more'),
+    path('mentions/', views.mentions, name='mentions'),
+    path('tag/<str:tag>/', views.tag_posts, name='tag_posts'),
     path(
         '<str:username>/follow/',
         views.profile_follow,
@@ -20,6 +27,7 @@ urlpatterns = [
         name='profile_unfollow'
     ),
     path('<str:username>/', views.profile, name='profile'),
+    path('<str:username>/more/', views.profile_more, name='profile_more'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path(
         '<str:username>/<int:post_id>/comment/',
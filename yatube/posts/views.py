@@ -1,58 +1,152 @@
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.urls import reverse
 
+from yatube.routers import replica_reads
 from yatube.settings import ITEMS_PER_PAGE
+from yatube.sqlite_wal.retry import after_commit, retry_on_locked
 
+from .feeds import (
+    TieredFeed, feed_cursor, follow_feed, group_feed, index_feed,
+    parse_cursor, profile_feed
+)
+from .feed_cache import (CachedFollowFeed, forget_card, forget_follow_feed,
+                         forget_follower_feeds)
+from .follow_cache import forget_following
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
+from .group_index import search_groups
+from .hashtags import index_post
+from .models import ActivityBucket, ArchivedPost, Follow, Post, Tag
+from .moderation import delete_images
+from .page_cache import forget_pages, shared_page
+from .renditions import get_renditions
+from .resolvers import (get_group_or_404, get_user_or_404, resolve_group,
+                        resolve_user)
+from .streaming import render_feed
+from .trending import get_trending, record_activity
+from .typeahead import typeahead
 
 
-@cache_page(20)
+def feed_fragment(request, feed, more_url):
+    """Следующая пачка карточек для бесконечной ленты без шапки, боковых
+    карточек и паджинатора. Курсор — pub_date и id последнего показанного
+    поста (feeds.feed_cursor); лишний пост в выборке показывает, есть ли
+    что грузить дальше, поэтому Paginator и подсчёт всей ленты здесь не
+    нужны."""
+    key = parse_cursor(request.GET.get('cursor', ''))
+    posts = feed.after(key, ITEMS_PER_PAGE + 1)
+    next_cursor = None
+    if len(posts) > ITEMS_PER_PAGE:
+        posts = posts[:ITEMS_PER_PAGE]
+        next_cursor = feed_cursor(posts[-1])
+    response = render(
+        request,
+        'include/posts/post_list.html',
+        {'posts': posts, 'next_cursor': next_cursor, 'more_url': more_url}
+    )
+    if next_cursor is not None:
+        response['X-Next-Cursor'] = next_cursor
+    return response
+
+
+def author_scopes(username):
+    author = resolve_user(username)
+    return [('user', author.id)] if author else []
+
+
+def post_scopes(username, post_id):
+    return author_scopes(username) + [('post', post_id)]
+
+
+def group_scopes(slug):
+    group = resolve_group(slug)
+    return [('group', group.id)] if group else []
+
+
+@shared_page(20)
+@replica_reads
 def index(request):
-    post_list = Post.objects.all()
+    post_list = index_feed()
     posts_total = post_list.count()
     paginator = Paginator(post_list, ITEMS_PER_PAGE)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
-    return render(
+    return render_feed(
         request,
         'index.html',
-        {'page': page, 'posts_total': posts_total, }
+        {'page': page,
+         'posts_total': posts_total,
+         'more_url': reverse('index_more'),
+         'trending_posts': get_trending(ActivityBucket.POST),
+         'trending_groups': get_trending(ActivityBucket.GROUP)}
     )
 
 
+@shared_page(20)
+@replica_reads
+def index_more(request):
+    return feed_fragment(request, index_feed(), reverse('index_more'))
+
+
+@shared_page(scopes=group_scopes)
+@replica_reads
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    group = get_group_or_404(slug)
+    post_list = group_feed(group)
     posts_total = post_list.count()
     paginator = Paginator(post_list, ITEMS_PER_PAGE)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
-    return render(
+    return render_feed(
         request,
         'group.html',
-        {'group': group, 'page': page, 'posts_total': posts_total, }
+        {'group': group,
+         'page': page,
+         'posts_total': posts_total,
+         'more_url': reverse('group_more', args=[slug]),
+         'trending_posts': get_trending(ActivityBucket.POST),
+         'trending_groups': get_trending(ActivityBucket.GROUP)}
     )
 
 
+@shared_page(scopes=group_scopes)
+@replica_reads
+def group_more(request, slug):
+    group = get_group_or_404(slug)
+    return feed_fragment(
+        request, group_feed(group), reverse('group_more', args=[slug])
+    )
+
+
+def group_search(request):
+    """Подсказки для выбора группы в форме поста."""
+    groups = search_groups(request.GET.get('q', ''))
+    return JsonResponse({
+        'results': [{'id': pk, 'title': title} for pk, title in groups]
+    })
+
+
+def typeahead_search(request):
+    """Подсказки поиска по пользователям и группам."""
+    return JsonResponse({
+        'results': typeahead.search(request.GET.get('q', ''))
+    })
+
+
+@shared_page(scopes=author_scopes)
+@replica_reads
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = get_user_or_404(username)
+    posts = profile_feed(author)
     posts_total = posts.count()
     paginator = Paginator(posts, ITEMS_PER_PAGE)
     page_number = request.GET.get('page')
     page_current = paginator.get_page(page_number)
     followers = author.follower.count()
     following = author.following.count()
-    follows = None
-    if request.user.is_authenticated:
-        follows = Follow.objects.filter(
-            user=request.user,
-            author=author
-        ).exists()
-    return render(
+    return render_feed(
         request,
         'posts/profile.html',
         {'author': author,
@@ -61,27 +155,35 @@ def profile(request, username):
          'page': page_current,
          'followers': followers,
          'following': following,
-         'follows': follows}
+         'more_url': reverse('profile_more', args=[username])}
     )
 
 
-def post_view(request, username, post_id):
-    post_current = get_object_or_404(
-        Post, id=post_id, author__username=username
+@shared_page(scopes=author_scopes)
+@replica_reads
+def profile_more(request, username):
+    author = get_user_or_404(username)
+    return feed_fragment(
+        request, profile_feed(author), reverse('profile_more', args=[username])
     )
-    author = post_current.author
-    posts = author.posts.all()
-    posts_total = posts.count()
+
+
+@shared_page(scopes=post_scopes)
+@replica_reads
+def post_view(request, username, post_id):
+    author = get_user_or_404(username)
+    post_current = Post.objects.filter(
+        id=post_id, author_id=author.id
+    ).select_related('group').first()
+    if post_current is None:
+        post_current = get_object_or_404(
+            ArchivedPost, id=post_id, author_id=author.id
+        )
+    post_current.author = author
+    posts_total = profile_feed(author).count()
     followers = author.follower.count()
     following = author.following.count()
-    follows = None
-    if request.user.is_authenticated:
-        follows = Follow.objects.filter(
-            user=request.user,
-            author=author
-        ).exists()
-    form = CommentForm()
-    comments = Comment.objects.filter(post=post_current)
+    comments = post_current.comments.select_related('author')
     context = {
         'author': author,
         'posts_total': posts_total,
@@ -90,8 +192,6 @@ def post_view(request, username, post_id):
         'post_id': post_id,
         'followers': followers,
         'following': following,
-        'follows': follows,
-        'form': form,
         'comments': comments
     }
     return render(
@@ -102,12 +202,23 @@ def post_view(request, username, post_id):
 
 
 @login_required
+@retry_on_locked
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        index_post(post)
+        after_commit(forget_follower_feeds, post.author_id)
+        after_commit(
+            forget_pages, ('user', post.author_id), ('group', post.group_id)
+        )
+        # Миниатюры нарезаются сразу, а не на первом просмотре ленты,
+        # но после коммита: PIL не держит блокировку записи SQLite.
+        after_commit(get_renditions, post.image.name)
+        if post.group_id:
+            record_activity(ActivityBucket.GROUP, post.group_id)
         return redirect('index')
     return render(
         request,
@@ -117,10 +228,14 @@ def new_post(request):
 
 
 @login_required
+@retry_on_locked
 def post_edit(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, pk=post_id)
-    if post.author != request.user:
+    author = get_user_or_404(username)
+    post = get_object_or_404(Post, author_id=author.id, pk=post_id)
+    if post.author_id != request.user.id:
         return redirect('post', username, post_id)
+    old_group_id = post.group_id
+    old_image = post.image.name
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -129,6 +244,17 @@ def post_edit(request, username, post_id):
     if form.is_valid():
         post = form.save(commit=False)
         post.save()
+        index_post(post)
+        after_commit(forget_card, post)
+        after_commit(forget_follower_feeds, post.author_id)
+        after_commit(
+            forget_pages, ('user', post.author_id), ('post', post_id),
+            ('group', old_group_id), ('group', post.group_id)
+        )
+        if old_image != post.image.name:
+            after_commit(get_renditions, post.image.name)
+            if old_image:
+                after_commit(delete_images, [old_image])
         return redirect('post', username, post_id)
     context = {
         'form': form,
@@ -143,42 +269,105 @@ def post_edit(request, username, post_id):
 
 
 @login_required
+@retry_on_locked
 def add_comment(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
+    author = get_user_or_404(username)
+    post = get_object_or_404(Post, author_id=author.id, id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.post = post
         comment.author = request.user
         comment.save()
+        after_commit(forget_card, post)
+        after_commit(forget_pages, ('user', author.id), ('post', post_id))
+        record_activity(ActivityBucket.POST, post.id)
         return redirect('post', username, post_id)
     return redirect('post', username, post_id)
 
 
 @login_required
+@replica_reads
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = CachedFollowFeed(request.user)
+    posts_total = post_list.count()
+    paginator = Paginator(post_list, ITEMS_PER_PAGE)
+    page_number = request.GET.get('page')
+    page = paginator.get_page(page_number)
+    context = {
+        'page': page,
+        'posts_total': posts_total,
+        'more_url': reverse('follow_more')
+    }
+    return render_feed(request, 'follow.html', context)
+
+
+@login_required
+@replica_reads
+def follow_more(request):
+    return feed_fragment(
+        request, follow_feed(request.user), reverse('follow_more')
+    )
+
+
+@replica_reads
+def tag_posts(request, tag):
+    tag = get_object_or_404(Tag, name=tag.lower())
+    post_list = TieredFeed(
+        Post.objects.filter(post_tags__tag=tag)
+        .order_by('-post_tags__pub_date')
+    )
+    posts_total = post_list.count()
+    paginator = Paginator(post_list, ITEMS_PER_PAGE)
+    page_number = request.GET.get('page')
+    page = paginator.get_page(page_number)
+    return render(
+        request,
+        'tag.html',
+        {'tag': tag, 'page': page, 'posts_total': posts_total, }
+    )
+
+
+@login_required
+@replica_reads
+def mentions(request):
+    post_list = TieredFeed(
+        Post.objects.filter(mentions__user=request.user)
+        .order_by('-mentions__pub_date')
+    )
     posts_total = post_list.count()
     paginator = Paginator(post_list, ITEMS_PER_PAGE)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
     context = {'page': page, 'posts_total': posts_total}
-    return render(request, 'follow.html', context)
+    return render(request, 'mentions.html', context)
 
 
 @login_required
+@retry_on_locked
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_user_or_404(username)
     if author != request.user:
         Follow.objects.get_or_create(user=request.user, author=author)
+        after_commit(forget_following, request.user.id)
+        after_commit(forget_follow_feed, request.user.id)
+        after_commit(
+            forget_pages, ('user', author.id), ('user', request.user.id)
+        )
     return redirect('profile', username)
 
 
 @login_required
+@retry_on_locked
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_user_or_404(username)
     if author != request.user:
         Follow.objects.filter(author=author, user=request.user).delete()
+        after_commit(forget_following, request.user.id)
+        after_commit(forget_follow_feed, request.user.id)
+        after_commit(
+            forget_pages, ('user', author.id), ('user', request.user.id)
+        )
     return redirect('profile', username)
 
 
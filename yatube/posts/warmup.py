@@ -0,0 +1,106 @@
+"""Прогрев кэшей после выкладки.
+
+Список адресов повторяет то, что первым делом откроют посетители:
+первые страницы главной и каждой группы, самые активные профили и
+посты, а также фрагменты бесконечной ленты для этих страниц. Рендер
+страницы сам заполняет все слои: общий кэш страниц, счётчики лент,
+карточки постов и миниатюры sorl-thumbnail."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from yatube.settings import ITEMS_PER_PAGE
+
+from .feeds import feed_cursor, group_feed, index_feed, profile_feed
+from .models import ActivityBucket, Group, Post, User
+from .trending import get_trending
+
+
+def feed_urls(url, more_url, feed, pages):
+    """Первые страницы ленты и фрагменты, которые подгрузит прокрутка
+    с первых pages - 1 страниц: курсор — последний пост каждой из них."""
+    urls = [url] + [f'{url}?page={page}' for page in range(2, pages + 1)]
+    shown = feed.after(None, (pages - 1) * ITEMS_PER_PAGE)
+    urls += [
+        f'{more_url}?cursor={feed_cursor(shown[end - 1])}'
+        for end in range(ITEMS_PER_PAGE, len(shown) + 1, ITEMS_PER_PAGE)
+    ]
+    return urls
+
+
+def warm_urls(pages=3, profiles=20, posts=50):
+    urls = feed_urls(
+        reverse('index'), reverse('index_more'), index_feed(), pages
+    )
+    for group in Group.objects.iterator():
+        urls += feed_urls(
+            reverse('group_posts', args=[group.slug]),
+            reverse('group_more', args=[group.slug]),
+            group_feed(group), pages
+        )
+    authors = User.objects.annotate(
+        total=Count('posts')
+    ).filter(total__gt=0).order_by('-total')
+    for author in authors[:profiles]:
+        urls += feed_urls(
+            reverse('profile', args=[author.username]),
+            reverse('profile_more', args=[author.username]),
+            profile_feed(author), pages
+        )
+    active = [
+        (item['username'], item['id'])
+        for item in get_trending(ActivityBucket.POST)
+    ]
+    active += Post.objects.annotate(total=Count('comments')).order_by(
+        '-total', '-id'
+    ).values_list('author__username', 'id')[:posts]
+    for username, post_id in dict.fromkeys(active):
+        urls.append(reverse('post', args=[username, post_id]))
+    return urls
+
+
+def fetch_local(url):
+    """Рендерит страницу в этом процессе: прогревается кэш из
+    настроек, что полезно, если он общий (memcached, redis, файлы)."""
+    return Client().get(url).status_code
+
+
+def http_fetcher(base_url, timeout=30):
+    """Запрашивает страницы у запущенного сайта — так прогреваются в
+    том числе LocMemCache его процессов."""
+    def fetch(url):
+        try:
+            with urlopen(base_url.rstrip('/') + url, timeout=timeout) as page:
+                page.read()
+                return page.status
+        except HTTPError as error:
+            return error.code
+    return fetch
+
+
+def warm(urls, fetch, concurrency=4):
+    """Запрашивает адреса не больше чем в concurrency потоков и отдаёт
+    (адрес, код ответа, секунды) в порядке адресов."""
+    def timed(url):
+        started = time.monotonic()
+        status = fetch(url)
+        return url, status, time.monotonic() - started
+
+    def pooled(url):
+        try:
+            return timed(url)
+        finally:
+            # Соединения с базой у каждого потока свои:
+            connections.close_all()
+
+    if concurrency == 1:
+        yield from map(timed, urls)
+        return
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        yield from executor.map(pooled, urls)
@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.core.exceptions import ValidationError
+
+from posts.resolvers import reserved_usernames
 
 User = get_user_model()
 
@@ -8,3 +11,9 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ("first_name", "last_name", "username", "email")
+
+    def clean_username(self):
+        username = self.cleaned_data['username']
+        if username in reserved_usernames():
+            raise ValidationError('Это имя занято адресом сайта.')
+        return username
@@ -0,0 +1,119 @@
+"""Очередь исходящей почты.
+
+QueuedEmailBackend только складывает письма в таблицу QueuedEmail — в
+той же транзакции, что и запрос, поэтому сброс пароля не ждёт SMTP и
+не теряет письмо, если сервер почты недоступен. Воркер send_queued
+забирает письма пачками и отправляет их через одно открытое соединение
+настоящего бэкенда QUEUED_EMAIL_BACKEND. Неудачные попытки
+повторяются с экспоненциальной задержкой, после
+EMAIL_QUEUE_MAX_ATTEMPTS письмо помечается failed и больше не берётся."""
+import pickle
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+# Сколько секунд взятая пачка недоступна другим воркерам:
+LEASE_SECONDS = 5 * 60
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        queued = []
+        for message in email_messages:
+            connection, message.connection = message.connection, None
+            try:
+                queued.append(QueuedEmail(message=pickle.dumps(message)))
+            finally:
+                message.connection = connection
+        QueuedEmail.objects.bulk_create(queued)
+        return len(queued)
+
+
+def lease(ids, now):
+    """Откладывает письма на LEASE_SECONDS одним условным UPDATE и
+    возвращает те, что достались этому воркеру. SQLite не умеет
+    SELECT ... FOR UPDATE, поэтому гонку решает сам UPDATE: письмо,
+    которое уже взял параллельный воркер, условию next_attempt <= now
+    больше не отвечает, и метка на нём остаётся чужой."""
+    token = uuid.uuid4().hex
+    QueuedEmail.objects.filter(
+        id__in=ids, failed=False, next_attempt__lte=now
+    ).update(
+        next_attempt=now + timedelta(seconds=LEASE_SECONDS), lease=token
+    )
+    return list(
+        QueuedEmail.objects.filter(id__in=ids, lease=token).order_by('id')
+    )
+
+
+def claim(batch_size):
+    """Забирает пачку писем, срок которых подошёл, так, чтобы
+    параллельный воркер не отправил их второй раз."""
+    now = timezone.now()
+    ids = list(
+        QueuedEmail.objects.filter(failed=False, next_attempt__lte=now)
+        .values_list('id', flat=True)[:batch_size]
+    )
+    return lease(ids, now) if ids else []
+
+
+def retry_later(email, error):
+    email.attempts += 1
+    email.last_error = repr(error)
+    email.failed = email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS
+    email.next_attempt = timezone.now() + timedelta(
+        seconds=settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (email.attempts - 1)
+    )
+    email.save(update_fields=[
+        'attempts', 'last_error', 'failed', 'next_attempt'
+    ])
+
+
+def postpone(emails, error):
+    for email in emails:
+        retry_later(email, error)
+    return len(emails)
+
+
+def send_queued(batch_size=100):
+    """Отправляет одну пачку писем и возвращает пару (отправлено,
+    отложено до следующей попытки)."""
+    emails = claim(batch_size)
+    if not emails:
+        return 0, 0
+    connection = get_connection(settings.QUEUED_EMAIL_BACKEND)
+    sent = []
+    failed = 0
+    try:
+        connection.open()
+    except Exception as error:
+        return 0, postpone(emails, error)
+    try:
+        for position, email in enumerate(emails):
+            try:
+                connection.send_messages([pickle.loads(email.message)])
+            except Exception as error:
+                failed += postpone([email], error)
+            else:
+                sent.append(email.id)
+                continue
+            # После ошибки соединение могло остаться в непонятном
+            # состоянии — открываем заново для следующих писем:
+            connection.close()
+            try:
+                connection.open()
+            except Exception as error:
+                # Сервер пропал посреди пачки: остаток откладываем, а не
+                # роняем воркер.
+                failed += postpone(emails[position + 1:], error)
+                break
+    finally:
+        connection.close()
+        QueuedEmail.objects.filter(id__in=sent).delete()
+    return len(sent), failed
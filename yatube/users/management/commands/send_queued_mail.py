@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.mail import send_queued
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди QueuedEmail пачками через одно '
+        'соединение. С --loop работает как постоянный воркер.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, когда очередь опустела.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Пауза в секундах, когда отправлять нечего.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        total = 0
+        while True:
+            sent, postponed = send_queued(options['batch_size'])
+            total += sent
+            if sent or postponed:
+                self.stdout.write(
+                    f'Отправлено: {sent}, отложено: {postponed}'
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Всего отправлено: {total}'))
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-19 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuedemail',
+            name='lease',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import models
+from django.utils import timezone
+
+
+class QueuedEmail(models.Model):
+    """Письмо, ждущее отправки воркером send_queued_mail. Хранится
+    сериализованный EmailMessage целиком, вместе с вложениями."""
+    message = models.BinaryField()
+    created = models.DateTimeField(auto_now_add=True)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    failed = models.BooleanField(default=False)
+    last_error = models.TextField(blank=True)
+    # Метка воркера, который последним взял письмо (users.mail.claim):
+    lease = models.CharField(max_length=32, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['next_attempt']
+        indexes = [models.Index(fields=['failed', 'next_attempt'])]
+
+    def __str__(self):
+        return f'Письмо {self.pk}, попыток: {self.attempts}'
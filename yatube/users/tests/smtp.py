@@ -0,0 +1,81 @@
+"""Минимальный SMTP-сервер для тестов очереди почты: принимает письма
+в память, считает соединения и отклоняет получателей с «reject» в
+адресе, чтобы проверять повторные попытки."""
+import socketserver
+import threading
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        self.reply('220 localhost ready')
+        self.recipients = []
+        for line in self.rfile:
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            method = getattr(self, f'smtp_{verb.lower()}', None)
+            if method is None:
+                self.reply('502 Not implemented')
+            else:
+                method(command)
+
+    def smtp_ehlo(self, command):
+        self.reply('250 localhost')
+
+    smtp_helo = smtp_ehlo
+
+    def smtp_mail(self, command):
+        self.recipients = []
+        self.reply('250 OK')
+
+    smtp_rset = smtp_noop = smtp_mail
+
+    def smtp_rcpt(self, command):
+        if 'reject' in command:
+            self.reply('550 No such user')
+            return
+        self.recipients.append(command.split(':', 1)[1].strip('<> '))
+        self.reply('250 OK')
+
+    def smtp_data(self, command):
+        self.reply('354 End data with <CR><LF>.<CR><LF>')
+        data = []
+        for line in self.rfile:
+            if line in (b'.\r\n', b'.\n'):
+                break
+            data.append(line)
+        with self.server.lock:
+            self.server.messages.append((self.recipients, b''.join(data)))
+        self.reply('250 OK')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.thread = threading.Thread(target=self.serve_forever)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
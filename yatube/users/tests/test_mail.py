@@ -0,0 +1,116 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.smtp import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import User
+
+from ..mail import lease, send_queued
+from ..models import QueuedEmail
+from .smtp import SMTPStandIn
+
+QUEUED = override_settings(
+    EMAIL_BACKEND='users.mail.QueuedEmailBackend',
+    QUEUED_EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+    EMAIL_HOST='127.0.0.1',
+    EMAIL_QUEUE_MAX_ATTEMPTS=2,
+    EMAIL_QUEUE_RETRY_DELAY=60,
+)
+
+
+@QUEUED
+class QueuedEmailTest(TestCase):
+    def send(self, *recipients):
+        for recipient in recipients:
+            mail.send_mail('Тема', 'Текст', 'site@yatube.ru', [recipient])
+
+    def test_password_reset_only_enqueues(self):
+        User.objects.create_user(
+            username='Forgetful', email='me@ya.ru', password='secret-42'
+        )
+        with SMTPStandIn() as server:
+            with self.settings(EMAIL_PORT=server.port):
+                self.client.post(
+                    reverse('password_reset'), {'email': 'me@ya.ru'}
+                )
+            self.assertEqual(server.connections, 0)
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+
+    def test_batch_goes_over_one_connection(self):
+        self.send('a@ya.ru', 'b@ya.ru', 'c@ya.ru')
+        with SMTPStandIn() as server:
+            with self.settings(EMAIL_PORT=server.port):
+                self.assertEqual(send_queued(batch_size=10), (3, 0))
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(
+            [recipients for recipients, _ in server.messages],
+            [['a@ya.ru'], ['b@ya.ru'], ['c@ya.ru']]
+        )
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    def test_failed_message_is_retried_then_given_up(self):
+        self.send('reject@ya.ru', 'ok@ya.ru')
+        with SMTPStandIn() as server:
+            with self.settings(EMAIL_PORT=server.port):
+                self.assertEqual(send_queued(), (1, 1))
+                # Повтор ещё не наступил:
+                self.assertEqual(send_queued(), (0, 0))
+                QueuedEmail.objects.update(
+                    next_attempt=timezone.now() - timedelta(seconds=1)
+                )
+                self.assertEqual(send_queued(), (0, 1))
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.attempts, 2)
+        self.assertTrue(email.failed)
+        self.assertIn('reject@ya.ru', email.last_error)
+
+    def test_unreachable_server_postpones_batch(self):
+        self.send('a@ya.ru')
+        with SMTPStandIn() as server:
+            port = server.port
+        with self.settings(EMAIL_PORT=port):
+            self.assertEqual(send_queued(), (0, 1))
+        self.assertEqual(QueuedEmail.objects.get().attempts, 1)
+
+    def test_rows_go_to_one_worker(self):
+        self.send('a@ya.ru', 'b@ya.ru')
+        now = timezone.now()
+        ids = list(QueuedEmail.objects.values_list('id', flat=True))
+        # Оба воркера успели выбрать одни и те же письма:
+        self.assertEqual(len(lease(ids, now)), 2)
+        self.assertEqual(lease(ids, now), [])
+
+    def test_server_lost_mid_batch_postpones_rest(self):
+        self.send('reject@ya.ru', 'a@ya.ru', 'b@ya.ru')
+        opened = []
+
+        def flaky_open(backend):
+            opened.append(backend)
+            if len(opened) > 1:
+                raise OSError('SMTP недоступен')
+            return real_open(backend)
+
+        real_open = EmailBackend.open
+        with SMTPStandIn() as server, mock.patch.object(
+            EmailBackend, 'open', autospec=True, side_effect=flaky_open
+        ):
+            with self.settings(EMAIL_PORT=server.port):
+                self.assertEqual(send_queued(), (0, 3))
+        self.assertEqual(
+            list(QueuedEmail.objects.values_list('attempts', flat=True)),
+            [1, 1, 1]
+        )
+
+    def test_worker_command(self):
+        self.send('a@ya.ru')
+        out = StringIO()
+        with SMTPStandIn() as server:
+            with self.settings(EMAIL_PORT=server.port):
+                call_command('send_queued_mail', stdout=out)
+        self.assertIn('Всего отправлено: 1', out.getvalue())
@@ -0,0 +1,27 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import User
+
+
+class SignUpTest(TestCase):
+    def signup(self, username):
+        return self.client.post(reverse('signup'), {
+            'username': username,
+            'password1': 'Pa55-word-42',
+            'password2': 'Pa55-word-42',
+        })
+
+    def test_route_names_are_reserved(self):
+        for username in ('mentions', 'tag', 'typeahead'):
+            with self.subTest(username=username):
+                response = self.signup(username)
+                self.assertFormError(
+                    response, 'form', 'username',
+                    'Это имя занято адресом сайта.'
+                )
+        self.assertFalse(User.objects.exists())
+
+    def test_ordinary_name_is_accepted(self):
+        self.signup('tagger')
+        self.assertTrue(User.objects.filter(username='tagger').exists())
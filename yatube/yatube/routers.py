@@ -0,0 +1,93 @@
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+PIN_COOKIE = 'pin_primary'
+
+_state = threading.local()
+
+
+def replica_reads(view):
+    """Разрешает отправлять чтения этой view на реплику. Реплика
+    выбирается одна на весь запрос, чтобы все запросы страницы видели
+    один и тот же снимок данных."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        previous = getattr(_state, 'replica', None)
+        replicas = settings.DATABASE_REPLICAS
+        if replicas and not getattr(_state, 'pinned', False):
+            _state.replica = random.choice(replicas)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _state.replica = previous
+    return wrapper
+
+
+def is_pinned():
+    """Клиент недавно писал и до конца закрепления читает из default."""
+    return getattr(_state, 'pinned', False)
+
+
+@contextmanager
+def primary_reads():
+    """Внутри блока все чтения идут в default, как у закреплённого
+    клиента, даже если view уже выбрала реплику. Нужен тому, что
+    попадёт в общий кэш: реплика может отставать на весь интервал
+    sync_replicas."""
+    previous = is_pinned(), getattr(_state, 'replica', None)
+    _state.pinned, _state.replica = True, None
+    try:
+        yield
+    finally:
+        _state.pinned, _state.replica = previous
+
+
+class ReplicaRouter:
+    """Пишем всегда в default, читаем с реплик только внутри view,
+    обёрнутых в replica_reads, и только если пользователь недавно ничего
+    не записывал (иначе он мог бы не увидеть свой же пост)."""
+
+    def db_for_read(self, model, **hints):
+        replica = getattr(_state, 'replica', None)
+        if replica and not getattr(_state, 'wrote', False):
+            return replica
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaPinningMiddleware:
+    """Закрепляет за клиентом основную базу на REPLICA_PIN_SECONDS после
+    любой записи, пока реплики догоняют primary."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.pinned = PIN_COOKIE in request.COOKIES
+        _state.wrote = False
+        _state.replica = None
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = _state.wrote
+            _state.pinned = _state.wrote = False
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+            )
+        return response
@@ -43,6 +43,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yatube.routers.ReplicaPinningMiddleware',
+    'posts.holes.HolePunchMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
@@ -73,13 +75,44 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Обёртка над sqlite3: WAL, прагмы и busy_timeout на каждом соединении
+# (см. yatube/sqlite_wal/base.py). Соединения держим открытыми между
+# запросами, чтобы не платить за открытие файла и прагмы каждый раз.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite_wal',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', default=60)),
     }
 }
 
+# Реплики только для чтения, например локальные копии базы:
+# DATABASE_REPLICAS=/srv/replica1.sqlite3,/srv/replica2.sqlite3
+# Обновлять копии можно командой manage.py sync_replicas.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.getenv('DATABASE_REPLICAS', default='').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'yatube.sqlite_wal',
+        'NAME': path,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+
+# Сколько секунд после записи читать только из основной базы. Реплики
+# сами не обновляются: отставание равно промежутку между запусками
+# sync_replicas, поэтому его нужно держать не больше этого значения
+# (manage.py sync_replicas --loop так и делает).
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', default=10))
+
+# Повторы пишущих транзакций при «database is locked»:
+DB_WRITE_RETRY_ATTEMPTS = 5
+DB_WRITE_RETRY_DELAY = 0.05
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -129,8 +162,19 @@ LOGIN_URL = "/auth/login/"
 LOGIN_REDIRECT_URL = "index"
 # LOGOUT_REDIRECT_URL = "index"
 
-EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+# Письма из запросов только встают в очередь, а отправляет их воркер
+# manage.py send_queued_mail через QUEUED_EMAIL_BACKEND:
+EMAIL_BACKEND = "users.mail.QueuedEmailBackend"
+QUEUED_EMAIL_BACKEND = os.getenv(
+    "QUEUED_EMAIL_BACKEND",
+    default="django.core.mail.backends.filebased.EmailBackend"
+)
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+EMAIL_HOST = os.getenv("EMAIL_HOST", default="localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", default=25))
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+# Задержка перед повтором в секундах, удваивается с каждой попыткой:
+EMAIL_QUEUE_RETRY_DELAY = 60
 
 # ALLOWED_HOSTS = [
 #     "localhost",
@@ -143,11 +187,35 @@ INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
+# Обёртка защищает от одновременного пересчёта истёкших ключей:
+# пересчитывает один запрос, остальные STALE_TIMEOUT секунд получают
+# прежнее значение. LocMemCache годится только для разработки: воркеры
+# moderate, archive_posts и delete_accounts сбрасывают кэш сайта и без
+# общего бэкенда (Redis, Memcached, FileBasedCache) не запускаются.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'yatube.stampede.StampedeCache',
+        'OPTIONS': {
+            'CACHE': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'STALE_TIMEOUT': 60,
+            'LOCK_TIMEOUT': 10,
+            'BETA': 1.0,
+        },
     }
 }
 
 # Pagination constant:
 ITEMS_PER_PAGE = 5
+
+# Сколько рекомендаций «на кого подписаться» показывать:
+SUGGESTIONS_PER_PAGE = 5
+
+# Если групп больше, форма поста вместо полного <select> показывает
+# поиск группы по началу названия:
+GROUP_SELECT_LIMIT = 200
+
+# Отдавать ленты потоком: шапка страницы уходит сразу, карточки постов —
+# по мере отрисовки. Такие ответы cache_page не кэширует.
+STREAM_FEEDS = os.getenv('STREAM_FEEDS', default='') == '1'
@@ -0,0 +1,40 @@
+from django.db.backends.sqlite3 import base
+
+# Порядок важен: journal_mode переключаем до остальных настроек.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def apply_pragmas(connection, pragmas):
+    cursor = connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            if name == 'journal_mode':
+                # Режим журнала хранится в самом файле базы. Переключение
+                # требует эксклюзивной блокировки, поэтому не трогаем его,
+                # если он уже нужный.
+                current = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+                if current.lower() == str(value).lower():
+                    continue
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite-бэкенд, который при открытии соединения включает WAL и
+    остальные прагмы из DEFAULT_PRAGMAS (их можно переопределить ключом
+    PRAGMAS в настройках базы)."""
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = dict(DEFAULT_PRAGMAS)
+        pragmas.update(self.settings_dict.get('PRAGMAS') or {})
+        apply_pragmas(connection, pragmas)
+        return connection
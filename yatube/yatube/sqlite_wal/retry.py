@@ -0,0 +1,66 @@
+import random
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+LOCKED_MESSAGES = ('database is locked', 'database table is locked', 'busy')
+
+
+def is_locked_error(error):
+    message = str(error).lower()
+    return any(text in message for text in LOCKED_MESSAGES)
+
+
+def after_commit(func, *args, **kwargs):
+    """Откладывает func до коммита текущей транзакции. Так делаются
+    побочные эффекты, которые видят другие запросы: сброс кэшей,
+    удаление файлов. До коммита они либо впустят в кэш старые данные,
+    либо останутся, даже если транзакцию откатят и повторят."""
+    transaction.on_commit(partial(func, *args, **kwargs))
+
+
+def rewind_uploads(args):
+    """Неудачная попытка уже дочитала загруженные файлы до конца;
+    без перемотки форма при повторе решит, что картинка битая."""
+    for arg in args:
+        files = getattr(arg, 'FILES', None)
+        if not files:
+            continue
+        for _, uploads in files.lists():
+            for upload in uploads:
+                upload.seek(0)
+
+
+def retry_on_locked(func=None, *, attempts=None, base_delay=None):
+    """Выполняет функцию в транзакции и повторяет её с экспоненциальной
+    задержкой, если SQLite ответил «database is locked».
+
+    Внутри уже открытой транзакции повторять бессмысленно (её всё равно
+    откатят), поэтому там ошибка пробрасывается сразу. Побочные эффекты
+    вне базы функция должна откладывать через after_commit: при откате
+    они отбрасываются вместе с транзакцией."""
+    if func is None:
+        return lambda f: retry_on_locked(
+            f, attempts=attempts, base_delay=base_delay
+        )
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        max_attempts = attempts or settings.DB_WRITE_RETRY_ATTEMPTS
+        delay = base_delay or settings.DB_WRITE_RETRY_DELAY
+        for attempt in range(1, max_attempts + 1):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as error:
+                if (
+                    attempt == max_attempts
+                    or not is_locked_error(error)
+                    or transaction.get_connection().in_atomic_block
+                ):
+                    raise
+                time.sleep(delay * 2 ** (attempt - 1) * random.uniform(1, 2))
+                rewind_uploads(args)
+    return wrapper
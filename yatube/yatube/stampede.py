@@ -0,0 +1,168 @@
+"""Кэш с защитой от «стада» на истечении ключа.
+
+Обёртка над любым бэкендом Django. Значение с конечным таймаутом
+хранится вместе со сроком годности и временем последнего пересчёта
+и физически живёт в кэше на STALE_TIMEOUT дольше. Дальше:
+
+- до срока get изредка, тем чаще, чем ближе срок и чем дольше пересчёт,
+  отвечает промахом (вероятностное раннее обновление, XFetch);
+- после срока промахом отвечает только тот, кто первым взял замок
+  на пересчёт, а остальные до его set получают старое значение.
+
+Так cache_page, фрагменты и счётчики пересчитывает один воркер, а не
+все запросы, пришедшие в момент истечения. Сколько пересчётов было и
+сколько запросов при этом обслужено старым значением, видно в
+metrics() и в manage.py cache_stats. Счётчики лежат во внутреннем
+кэше, поэтому из другого процесса их видно, только если этот кэш общий
+(memcached, redis, файлы, база), а не LocMemCache."""
+import math
+import random
+import time
+from collections import namedtuple
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.module_loading import import_string
+
+Entry = namedtuple('Entry', 'value expiry delta')
+
+MISSING = object()
+METRICS = ('recomputes', 'early', 'coalesced')
+METRICS_KEY = 'stampede:metrics:%s'
+LOCK_SUFFIX = ':stampede-lock'
+# Сколько считаем пересчёт, пока ни разу его не замерили:
+DEFAULT_DELTA = 0.1
+
+PROCESS_LOCAL = (LocMemCache, DummyCache)
+
+
+def is_process_local(cache):
+    """Кэш, который живёт в памяти одного процесса: то, что в него
+    положила команда manage.py, веб-воркеры не увидят, и наоборот."""
+    return isinstance(getattr(cache, 'cache', cache), PROCESS_LOCAL)
+
+
+class StampedeCache(BaseCache):
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS', {}))
+        inner = options.pop('CACHE', {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        })
+        self.beta = options.pop('BETA', 1.0)
+        self.stale_timeout = options.pop('STALE_TIMEOUT', 60)
+        self.lock_timeout = options.pop('LOCK_TIMEOUT', 10)
+        super().__init__({**params, 'OPTIONS': options})
+        self.cache = import_string(inner['BACKEND'])(
+            inner.get('LOCATION', location), inner
+        )
+
+    def lock_key(self, key):
+        return f'{key}{LOCK_SUFFIX}'
+
+    def count(self, name):
+        key = METRICS_KEY % name
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, 1, None)
+
+    def metrics(self):
+        return {
+            name: self.cache.get(METRICS_KEY % name, 0) for name in METRICS
+        }
+
+    def reset_metrics(self):
+        self.cache.delete_many([METRICS_KEY % name for name in METRICS])
+
+    def finite(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None or timeout <= 0:
+            return None
+        return timeout
+
+    def get(self, key, default=None, version=None):
+        entry = self.cache.get(key, MISSING, version=version)
+        now = time.time()
+        if entry is MISSING:
+            # Замок берём и на обычном промахе: по нему set узнает, сколько
+            # длился пересчёт.
+            self.cache.add(
+                self.lock_key(key), now, self.lock_timeout, version=version
+            )
+            return default
+        if not isinstance(entry, Entry):
+            return entry
+        gap = entry.delta * self.beta * -math.log(1.0 - random.random())
+        if now + gap < entry.expiry:
+            return entry.value
+        if self.cache.add(
+            self.lock_key(key), now, self.lock_timeout, version=version
+        ):
+            self.count('recomputes')
+            if now < entry.expiry:
+                self.count('early')
+            return default
+        self.count('coalesced')
+        return entry.value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.finite(timeout)
+        lock_key = self.lock_key(key)
+        if timeout is None:
+            self.cache.set(key, value, None, version=version)
+        else:
+            now = time.time()
+            started = self.cache.get(lock_key, version=version)
+            delta = now - started if started is not None else DEFAULT_DELTA
+            self.cache.set(
+                key, Entry(value, now + timeout, delta),
+                timeout + self.stale_timeout, version=version
+            )
+        self.cache.delete(lock_key, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        entry = self.cache.get(key, MISSING, version=version)
+        if entry is MISSING:
+            finite = self.finite(timeout)
+            if finite is None:
+                return self.cache.add(key, value, None, version=version)
+            return self.cache.add(
+                key, Entry(value, time.time() + finite, DEFAULT_DELTA),
+                finite + self.stale_timeout, version=version
+            )
+        # Старое значение только ждёт пересчёта и add не мешает:
+        if isinstance(entry, Entry) and entry.expiry <= time.time():
+            self.set(key, value, timeout, version=version)
+            return True
+        return False
+
+    def incr(self, key, delta=1, version=None):
+        entry = self.cache.get(key, MISSING, version=version)
+        if not isinstance(entry, Entry):
+            return self.cache.incr(key, delta, version=version)
+        value = entry.value + delta
+        left = entry.expiry - time.time() + self.stale_timeout
+        self.cache.set(
+            key, entry._replace(value=value), max(left, 1), version=version
+        )
+        return value
+
+    def has_key(self, key, version=None):
+        return self.cache.has_key(key, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.cache.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.cache.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        self.cache.delete_many(keys, version=version)
+
+    def clear(self):
+        self.cache.clear()
+
+    def close(self, **kwargs):
+        self.cache.close(**kwargs)